@@ -0,0 +1,54 @@
+import argparse
+import time
+from bs4 import BeautifulSoup
+from benchmarks.fixtures import load_fixtures, recorded
+from utils.extract import ENGINES, PRICE_CLASS, STATS_CLASS, MAX_STATS
+
+
+
+def extract_bs4(html):
+    # What every page used to do: build the full tree, then look up two classes
+    soup = BeautifulSoup(html, 'html.parser')
+    price_elem = soup.find(class_=PRICE_CLASS)
+    stats = [i.text for i in soup.find_all(class_=STATS_CLASS)][:MAX_STATS]
+    return (price_elem.text if price_elem else None), stats
+
+
+def time_engine(func, pages, repeat):
+    # Best of `repeat` runs per page, averaged over all pages
+    total = 0
+    for html in pages.values():
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func(html)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        total += best
+    return total / len(pages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse-time per quote page for each HTML extraction engine")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--synthetic", action="store_true", help="also time generated pages for symbols without a saved one")
+    args = parser.parse_args()
+
+    pages = load_fixtures() if args.synthetic else load_fixtures(recorded())
+    size = sum(len(html) for html in pages.values()) / len(pages) / 1024
+    print(f"{len(pages)} pages, {size:.0f} KB on average\n")
+
+    engines = {"bs4": extract_bs4, **ENGINES}
+    expected = {name: extract_bs4(html) for name, html in pages.items()}
+    baseline = None
+    print(f"{'engine':<12}{'ms/page':>10}{'speedup':>10}{'reduction':>12}")
+    for engine, func in engines.items():
+        for name, html in pages.items():
+            assert func(html) == expected[name], f"{engine} disagrees with bs4 on {name}"
+        seconds = time_engine(func, pages, args.repeat)
+        baseline = baseline or seconds
+        print(f"{engine:<12}{seconds * 1000:>10.2f}{baseline / seconds:>9.1f}x{(1 - seconds / baseline) * 100:>11.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from utils.symbols import PAGES
+
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def run_session(pages, get_quotes, start_render_budget, deadline, stop, latencies, failures, lock):
+    # One viewer refreshing the four tiles of each market page in turn, as fast as it can, through the
+    # same poller-backed path a page run takes
+    while not stop.is_set():
+        for tiles in pages:
+            started = time.perf_counter()
+            start_render_budget(deadline)
+            results = get_quotes(tiles)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                failures[0] += sum(1 for result in results.values() if result is None or result.price is None)
+            if stop.is_set():
+                break
+
+
+def main():
+    # The synthetic prices go to a scratch directory instead of the app's .cache, so the stores are pointed
+    # there before anything that opens them is imported
+    scratch = tempfile.mkdtemp(prefix="moneyview-bench-")
+    os.environ["MONEYVIEW_TICK_DIR"] = os.path.join(scratch, "ticks")
+    os.environ["MONEYVIEW_QUOTE_DB"] = os.path.join(scratch, "quotes.sqlite3")
+    os.environ["MONEYVIEW_HTTP_CACHE_DIR"] = os.path.join(scratch, "http")
+    from benchmarks.quote_server import add_options, server_options, start_server
+
+    parser = argparse.ArgumentParser(description="Page refresh throughput and tail latency against the stand-in server")
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent viewers")
+    parser.add_argument("--duration", type=float, default=10, help="seconds to run")
+    parser.add_argument("--deadline", type=float, default=4, help="per-refresh deadline in seconds")
+    parser.add_argument("--url", default=None, help="use an already running server instead of starting one")
+    parser.add_argument("--rate", type=float, default=0, help="upstream requests per second, 0 for no limit")
+    add_options(parser)
+    args = parser.parse_args()
+
+    if args.url is None:
+        server = start_server(**server_options(args))
+        args.url = server.base_url
+    os.environ["MONEYVIEW_QUOTE_BASE_URL"] = args.url
+
+    # Imported after the base URL is set so nothing reaches Google
+    from utils.poller import get_quotes, start_render_budget
+    from utils.ratelimit import limiter
+    limiter.rate = args.rate
+
+    latencies, failures, lock, stop = [], [0], threading.Lock(), threading.Event()
+    sessions = [
+        threading.Thread(target=run_session, args=(list(PAGES.values()), get_quotes, start_render_budget, args.deadline, stop, latencies, failures, lock))
+        for _ in range(args.sessions)
+    ]
+    started = time.perf_counter()
+    for session in sessions:
+        session.start()
+    time.sleep(args.duration)
+    stop.set()
+    for session in sessions:
+        session.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"{args.sessions} sessions for {elapsed:.1f}s against {args.url}")
+    print(f"refreshes:   {len(latencies)} ({len(latencies) / elapsed:.1f}/s, {len(latencies) * 4 / elapsed:.1f} quotes/s)")
+    print(f"failed:      {failures[0]} quotes")
+    if latencies:
+        print(f"latency ms:  p50 {percentile(latencies, 50) * 1000:.0f}  p95 {percentile(latencies, 95) * 1000:.0f}"
+              f"  p99 {percentile(latencies, 99) * 1000:.0f}  max {max(latencies) * 1000:.0f}  mean {statistics.mean(latencies) * 1000:.0f}")
+    for (host, priority), counts in limiter.stats().items():
+        print(f"rate limit:  {host} priority {priority}: " + ", ".join(f"{count} {outcome}" for outcome, count in counts.items()))
+    shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
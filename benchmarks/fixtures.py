@@ -0,0 +1,93 @@
+import os
+import random
+import sys
+from utils.extract import PRICE_CLASS, STATS_CLASS
+from utils.quote_client import fetch
+from utils.symbols import SYMBOLS, quote_url
+
+
+
+# one quote page per asset class is committed here, `python -m benchmarks.fixtures [names]` records
+# live pages over them
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# a real quote page carries roughly this much inline script and style before the price
+PADDING_KB = 900
+
+
+def fixture_path(name):
+    # Currency names contain a slash, same substitution as the Index_data files
+    return os.path.join(FIXTURE_DIR, f"{name.replace('/', ' ')}.html")
+
+
+def recorded():
+    # Symbols with a saved page in FIXTURE_DIR
+    return [name for name in SYMBOLS if os.path.exists(fixture_path(name))]
+
+
+def record(names=SYMBOLS):
+    # Save the live Google Finance page of every symbol for offline benchmarks
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for name in names:
+        response = fetch(quote_url(name))
+        if response.status_code != 200:
+            print(f"Skipping {name}: status code {response.status_code}")
+            continue
+        with open(fixture_path(name), 'wb') as f:
+            f.write(response.content)
+        print(f"Recorded {name} ({len(response.content) // 1024} KB)")
+
+
+def synthetic_page(name, price=None):
+    # Stand-in with the same shape as a quote page: heavy head, price header, key stats, profile
+    rng = random.Random(name)
+    asset_class = SYMBOLS[name][1]
+    if price is None:
+        price = round(rng.uniform(10, 50000), 2)
+    prev_close = round(price * rng.uniform(0.97, 1.03), 2)
+    currency = "$" if asset_class in ("stock", "futures") else ""
+
+    stats = [f"{currency}{prev_close:,.2f}",
+             f"{currency}{price * 0.99:,.2f} - {currency}{price * 1.01:,.2f}",
+             f"{currency}{price * 0.7:,.2f} - {currency}{price * 1.3:,.2f}"]
+    if asset_class in ("stock", "futures"):
+        stats += ["3.24T USD", "62.13M", "32.50", "0.47%", "NASDAQ", "-", "Jane Doe", "Apr 1, 1976", "Springfield", "161,000"]
+
+    script = "".join(f"var _{i}=function(a,b){{return a.{name.split()[0].lower()}(b)}};" for i in range(PADDING_KB * 16))
+    style = "".join(f".c{i}{{margin:{i % 9}px}}" for i in range(PADDING_KB * 16))
+    # the header, news and related-quote cards make up most of the DOM around the stats
+    cards = [
+        f'<div class="sbnBtf"><a href="/q/{i}"><div class="Yfwt5">Headline {i}</div><span class="xUrNXd">{i}m ago</span></a></div>'
+        for i in range(rng.randint(2500, 3500))
+    ]
+    header, news = "".join(cards[:len(cards) // 4]), "".join(cards[len(cards) // 4:])
+    rows = "".join(
+        f'<div class="gyFHrc"><span class="mfs7Fc">Stat {i}</span><div class="{STATS_CLASS}">{value}</div></div>'
+        for i, value in enumerate(stats)
+    )
+    return (
+        f'<!doctype html><html lang="en"><head><meta charset="utf-8"><title>{name}</title>'
+        f'<style>{style[:PADDING_KB * 256]}</style><script nonce="x">{script[:PADDING_KB * 768]}</script></head>'
+        f'<body><c-wiz><nav>{header}</nav><div class="zzDege">{name}</div>'
+        f'<div class="rPF6Lc"><div class="AHmHk"><span><div class="{PRICE_CLASS}">{currency}{price:,.2f}</div></span></div></div>'
+        f'<div class="eYanAe">{rows}</div>'
+        f'<div class="bLLb2d">About {name}<br>Lorem ipsum dolor sit amet.<img src="logo.png"></div>{news}'
+        f'</c-wiz></body></html>'
+    )
+
+
+def load_fixtures(names=SYMBOLS):
+    # Recorded pages when available, synthetic ones for the rest
+    pages = {}
+    for name in names:
+        path = fixture_path(name)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                pages[name] = f.read()
+        else:
+            pages[name] = synthetic_page(name).encode()
+    return pages
+
+
+if __name__ == "__main__":
+    record(sys.argv[1:] or SYMBOLS)
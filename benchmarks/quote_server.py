@@ -0,0 +1,130 @@
+import argparse
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+from benchmarks.fixtures import load_fixtures
+from utils.extract import extract_quote
+from utils.quotes import to_float
+from utils.symbols import SYMBOLS
+
+
+
+class QuoteServer(ThreadingHTTPServer):
+    # Serves the recorded quote page of every symbol under /finance/quote/<ticker>
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, jitter=0.0, error_rate=0.0, drift=0.0, seed=None):
+        super().__init__(address, QuoteHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.drift = drift
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.pages = {}
+        self.prices = {}
+
+        # Split every page around its price so a drifted price can be spliced in per request
+        for name, html in load_fixtures().items():
+            html = html.decode("utf-8", errors="replace")
+            price_text, _ = extract_quote(html)
+            head, _, tail = html.partition(f">{price_text}<")
+            prefix = ''.join(filter(lambda x: not (x.isdigit() or x in ".,"), price_text))
+            self.pages[SYMBOLS[name][0]] = (head + ">" + prefix, "<" + tail)
+            self.prices[SYMBOLS[name][0]] = to_float(price_text)
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/finance/quote/"
+
+    def next_price(self, ticker):
+        # Random walk of +-drift (a fraction, e.g. 0.001 for 10 bps) per request
+        with self.lock:
+            self.requests += 1
+            price = self.prices[ticker] * (1 + self.random.uniform(-self.drift, self.drift))
+            self.prices[ticker] = price
+            return price
+
+    def delay(self):
+        with self.lock:
+            return self.latency + self.random.uniform(0, self.jitter)
+
+    def should_fail(self):
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+
+class QuoteHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        ticker = unquote(self.path.rsplit("/", 1)[-1])
+        time.sleep(self.server.delay())
+
+        if ticker not in self.server.pages:
+            self.send_body(404, b"Not found")
+            return
+        if self.server.should_fail():
+            self.send_body(503, b"Service unavailable")
+            return
+
+        head, tail = self.server.pages[ticker]
+        body = f"{head}{self.server.next_price(ticker):,.2f}{tail}".encode()
+        # Unchanged pages (e.g. --drift 0) answer conditional requests with a bodiless 304
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_body(304, b"", etag)
+            return
+        self.send_body(200, body, etag)
+
+    def send_body(self, status, body, etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(host="127.0.0.1", port=0, **options):
+    # Runs the server on a daemon thread, port 0 picks a free port
+    server = QuoteServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, name="quote-server", daemon=True).start()
+    return server
+
+
+def add_options(parser):
+    parser.add_argument("--latency", type=float, default=0.05, help="base response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.05, help="extra random delay of up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--drift", type=float, default=0.001, help="max relative price move per request")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def server_options(args):
+    return dict(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, drift=args.drift, seed=args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline stand-in for the Google Finance quote pages")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_options(parser)
+    args = parser.parse_args()
+
+    server = QuoteServer((args.host, args.port), **server_options(args))
+    print(f"Serving {len(server.pages)} symbols, run the app with MONEYVIEW_QUOTE_BASE_URL={server.base_url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,11 @@
 import streamlit as st
-import requests
-import time
-import pandas as pd
-import os
-from bs4 import BeautifulSoup
 from streamlit_extras.colored_header import colored_header
-import plotly.graph_objects as go
+from utils.charts import chart_figure
+from utils.downsample import RANGES
+from utils.history import csv_mtime
+from utils.poller import get_quote, get_quotes, start_render_budget
+from utils.quotes import freshness
+from utils.ticks import recorder
 
 
 
@@ -31,134 +31,39 @@ def page_title():
     )
     
     
-@st.cache_data
-def load_data(file_name):
-    try:
-        # Construct the path to the data file
-        file_path = os.path.join("Index_data", f"{file_name}.csv")
-        
-        # Ensure the file exists
-        if not os.path.exists(file_path):
-            st.error(f"File not found: {file_path}")
-            return None
-        
-        # Load the data
-        data = pd.read_csv(file_path, header=0)
-        return data
-    
-    except Exception as e:
-        st.error(f"An error occurred while loading the data: {e}")
-        return None
-
-
 def get_index_info(index_name):
-    dict_index = {
-        "Bitcoin": "https://www.google.com/finance/quote/BTC-INR",
-        "Ethereum": "https://www.google.com/finance/quote/ETH-INR",
-        "Cardano": "https://www.google.com/finance/quote/ADA-INR",
-        "Dogecoin": "https://www.google.com/finance/quote/DOGE-INR"
-    }
-    
-    url = dict_index.get(index_name)
-    if not url:
-        return None, None
-        
-    information = []
-    response = requests.get(url)
-    if response.status_code == 200:
-        soup = BeautifulSoup(response.content, 'html.parser')
-        data = soup.find_all(class_="P6K39c")
-        for i in data:
-            information.append(i.text.replace(",", ""))
-    
-    return information 
-
-
-
+    snapshot = get_quote(index_name)
+    # A panel drawn without its quote is redrawn by the tiles once the quote arrives
+    st.session_state.panel_waiting = None if snapshot else index_name
+    information = snapshot.stats if snapshot else []
+    # pad so a missing stat shows as None instead of breaking the panel
+    return information + [None] * 8
 
 
-def index_scraper(index_name):
-    dict_index = {
-        "Bitcoin": "https://www.google.com/finance/quote/BTC-INR",
-        "Ethereum": "https://www.google.com/finance/quote/ETH-INR",
-        "Cardano": "https://www.google.com/finance/quote/ADA-INR",
-        "Dogecoin": "https://www.google.com/finance/quote/DOGE-INR"
-    }
-    
-    url = dict_index.get(index_name)
-    if not url:
+def index_scraper(snapshot):
+    # Quotes are scraped by the shared background poller, this only reads the latest one
+    if snapshot is None:
         return None, None
-    
-    response = requests.get(url)
-    soup = BeautifulSoup(response.content, 'html.parser')
-    
-    try:
-        price_elem = soup.find(class_="YMlKec fxKbKc")
-        if price_elem:
-            price = float(price_elem.text.replace(",", ""))
-        else:
-            price = None
-        
-        prev_close_elem = soup.find(class_="P6K39c")
-        if prev_close_elem:
-            prev_close = float(prev_close_elem.text.replace(",", ""))
-        else:
-            prev_close = None
-        
-        if price is not None and prev_close is not None:
-            change_price = price - prev_close
-            changes_per = round((change_price * 100) / price, 2)
-        else:
-            changes_per = None
-    
-    except Exception as e:
-        st.error(f"Error fetching data: {e}")
-        price = None
-        changes_per = None
-    
-    return price, changes_per
-
+    return snapshot.price, snapshot.change_percent
 
-def plot_line_chart(x_axis, y_axis, index_name, interval):
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=x_axis, y=y_axis, mode='lines+markers', name='Price'))
-    fig.update_layout(
-        title=f'{index_name}',
-        xaxis_title=f'{interval}',
-        yaxis_title='Price',
-        hovermode='x unified',  
-        template='plotly_white'  
-    )    
-    return fig
 
-
-def get_index_data(index_name, interval):
-    data = load_data(index_name)
-    x_axis, y_axis = filter_data(data, interval)
-    fig = plot_line_chart(x_axis, y_axis, index_name, interval)
+def get_index_data(index_name):
+    # Every recorded tick and every change of the CSV changes the charts of this index
+    tick_count = recorder.count(index_name)
+    data_version = (csv_mtime(index_name), tick_count)
     
-    # Display the plot and interval buttons in the same container    
+    # Display the range selector and the plot in the same container    
     container = st.container( border=True)
     with container:
         
-        # Buttons for interval selection
-        col1, col2, col3, col4 = st.columns([1,1.3,1,8])
-        with col1:
-            if st.button("Day"):
-                st.session_state.interval = 'Day'
-                st.rerun()
-        with col2:
-            if st.button("Month"):
-                st.session_state.interval = 'Month'
-                st.rerun()
-        with col3:
-            if st.button("Year"):
-                st.session_state.interval = 'Year'
-                st.rerun()
-        with col4:
-            pass  
+        # Intraday intervals join the chart's interval buttons once live prices are recorded
+        if not tick_count:
+            st.caption("1 min, 5 min and Hour appear once live prices are recorded")
+        
+        chart_range = st.radio("Range", list(RANGES), horizontal=True, key="range", label_visibility="collapsed")
+        
         # Plot the chart
-        st.plotly_chart(fig)
+        st.plotly_chart(chart_figure(index_name, chart_range, data_version))
         
     # Display additional index info
     col1 , col2 = st.columns([1,1])
@@ -203,64 +108,44 @@ def get_index_data(index_name, interval):
 
 
 
-def filter_data(data, interval):
-    df = pd.DataFrame(data)
-    df['Date'] = pd.to_datetime(df['Date'], format='%m/%d/%Y %H:%M:%S')
-    df.set_index('Date', inplace=True)
-
-    if interval == "Day":
-        df_resampled = df.resample('D').mean().reset_index()
-    elif interval == "Month":
-        df_resampled = df.resample('M').mean().reset_index()
-    elif interval == "Year":
-        df_resampled = df.resample('Y').mean().reset_index()
-    
-    return df_resampled['Date'].tolist(), df_resampled['Close'].tolist()
-
+# index name -> session state keys of its metric tile
+metric_keys = {
+    "Bitcoin": ("bitcoin_price", "bitcoin_changes"),
+    "Ethereum": ("ethereum_price", "ethereum_changes"),
+    "Cardano": ("cardano_price", "cardano_changes"),
+    "Dogecoin": ("Dogecoin_price", "Dogecoin_changes"),
+}
 
-    
 
 def update_metrics():
-    bitcoin_price, bitcoin_changes = index_scraper("Bitcoin")
-    ethereum_price, ethereum_changes = index_scraper("Ethereum")
-    cardano_price, cardano_changes = index_scraper("Cardano")
-    Dogecoin_price, Dogecoin_changes = index_scraper("Dogecoin")
-    
-    # Store fetched values in session state
-    st.session_state.bitcoin_price = bitcoin_price
-    st.session_state.bitcoin_changes = bitcoin_changes
-    st.session_state.ethereum_price = ethereum_price
-    st.session_state.ethereum_changes = ethereum_changes
-    st.session_state.cardano_price = cardano_price
-    st.session_state.cardano_changes = cardano_changes
-    st.session_state.Dogecoin_price = Dogecoin_price
-    st.session_state.Dogecoin_changes = Dogecoin_changes
-
-
-def main():
-    page_title()  
-    st.markdown("</br>", unsafe_allow_html=True)
-    
-    # Initialize session state for metrics and interval
-    if 'bitcoin_price' not in st.session_state:
-        st.session_state.bitcoin_price = 0.0
-        st.session_state.bitcoin_changes = 0.0
-        st.session_state.ethereum_price = 0.0
-        st.session_state.ethereum_changes = 0.0
-        st.session_state.cardano_price = 0.0
-        st.session_state.cardano_changes = 0.0
-        st.session_state.Dogecoin_price = 0.0
-        st.session_state.Dogecoin_changes = 0.0      
-    
-    if 'last_refresh' not in st.session_state:
-        st.session_state.last_refresh = time.time()
-    if 'interval' not in st.session_state:
-        st.session_state.interval = 'Year'         
-                
-    # Add a button to manually update the metrics
-    if st.button("Refresh"):
-        update_metrics()
-        st.rerun()  
+    # All tiles come from one batch call, indices the poller has no quote for yet keep their last value
+    quotes = get_quotes(metric_keys)
+    stale = []
+    for index_name, (price_key, changes_key) in metric_keys.items():
+        price, changes = index_scraper(quotes[index_name])
+        if price is None:
+            stale.append(index_name)
+            continue
+        # Store fetched values in session state
+        st.session_state[price_key] = price
+        st.session_state[changes_key] = changes
+    st.session_state.stale_metrics = stale
+    return quotes
+
+
+# seconds between two refreshes of the metric tiles
+REFRESH_INTERVAL = 10
+
+
+@st.fragment(run_every=REFRESH_INTERVAL)
+def metric_tiles():
+    # Quotes missing from the cache may only hold up this run for the render budget
+    start_render_budget()
+    # Reading the shared quote cache never waits on the network, so refresh the tiles on every run
+    quotes = update_metrics()
+    
+    # A click reruns only this fragment, which has just read the latest quotes
+    st.button("Refresh")
         
     st.caption("Please hit refresh button to get the latest data")    
          
@@ -269,28 +154,55 @@ def main():
     with col1:
         cont1 = st.container(border=True)
         cont1.metric("Bitcoin (BTC/INR)", st.session_state.bitcoin_price, st.session_state.bitcoin_changes)
+        cont1.caption(freshness(quotes["Bitcoin"]))
     with col2:
         cont2 = st.container(border=True)
         cont2.metric("Ethereum (ETH/INR)", st.session_state.ethereum_price, st.session_state.ethereum_changes)
+        cont2.caption(freshness(quotes["Ethereum"]))
     with col3:
         cont3 = st.container(border=True)
         cont3.metric("Cardano (ADA/INR)", st.session_state.cardano_price, st.session_state.cardano_changes)
+        cont3.caption(freshness(quotes["Cardano"]))
     with col4:
         cont4 = st.container(border=True)
         cont4.metric("Dogecoin (DOGE/INR)", st.session_state.Dogecoin_price, st.session_state.Dogecoin_changes)
+        cont4.caption(freshness(quotes["Dogecoin"]))
+    
+    # session state is shared between pages, so only report this page's indices
+    stale = [name for name in st.session_state.get('stale_metrics', []) if name in metric_keys]
+    if stale:
+        st.caption(f"Showing last known values for: {', '.join(stale)}")
+    
+    # The panels below only render on a full run, so fill in one that is still waiting for its quote
+    waiting = st.session_state.get('panel_waiting')
+    if quotes.get(waiting) is not None:
+        st.session_state.panel_waiting = None
+        st.rerun(scope="app")
+
+
+def main():
+    page_title()  
+    st.markdown("</br>", unsafe_allow_html=True)
+    
+    # Initialize session state for metrics
+    if 'bitcoin_price' not in st.session_state:
+        st.session_state.bitcoin_price = 0.0
+        st.session_state.bitcoin_changes = 0.0
+        st.session_state.ethereum_price = 0.0
+        st.session_state.ethereum_changes = 0.0
+        st.session_state.cardano_price = 0.0
+        st.session_state.cardano_changes = 0.0
+        st.session_state.Dogecoin_price = 0.0
+        st.session_state.Dogecoin_changes = 0.0      
+    
+    # The tiles refresh on their own, the rest of the page only reruns on interaction
+    metric_tiles()
     
     st.markdown("<hr>", unsafe_allow_html=True)    
     selected_index = st.selectbox("Select an index", ["Bitcoin", "Ethereum"], key="index")
-    interval = st.session_state.interval
 
-    get_index_data(selected_index, interval)
+    get_index_data(selected_index)
     
-    # Automatically refresh the data
-    last_refresh = st.session_state.get('last_refresh', 0)
-    if time.time() - last_refresh > 10:
-        update_metrics()
-        st.session_state.last_refresh = time.time()
-        st.rerun() 
     
     
     
@@ -1,12 +1,13 @@
 import streamlit as st
-import requests
-import pandas as pd
 import time
 import random
-import os
-from bs4 import BeautifulSoup
 from streamlit_extras.colored_header import colored_header
-import plotly.graph_objects as go
+from utils.charts import chart_figure
+from utils.downsample import RANGES
+from utils.history import csv_mtime
+from utils.poller import get_quote, get_quotes, start_render_budget
+from utils.quotes import freshness
+from utils.ticks import recorder
 
 
 
@@ -24,81 +25,22 @@ custom_css = """
 st.markdown(custom_css, unsafe_allow_html=True)
 
 
-@st.cache_data
-def load_data(file_name):
-    try:
-        # Construct the path to the data file
-        file_path = os.path.join("Index_data", f"{file_name}.csv")
-        
-        # Ensure the file exists
-        if not os.path.exists(file_path):
-            st.error(f"File not found: {file_path}")
-            return None
-        
-        # Load the data
-        data = pd.read_csv(file_path, header=0)
-        return data
-    
-    except Exception as e:
-        st.error(f"An error occurred while loading the data: {e}")
-        return None
-
-
-def index_scraper(index_name):
-    if index_name == "SENSEX":
-        url = f"https://www.google.com/finance/quote/{index_name}:INDEXBOM"
-    else:
-        url = f"https://www.google.com/finance/quote/{index_name}:INDEXNSE"
-        
-    response = requests.get(url)
-    
-    if response.status_code == 200:
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Try to find price and previous close
-        price_elem = soup.find(class_="YMlKec fxKbKc")
-        prev_close_elem = soup.find(class_="P6K39c")
-        
-        if price_elem and prev_close_elem:
-            try:
-                price = float(price_elem.text.replace(",", ""))
-                prev_close = float(prev_close_elem.text.replace(",", ""))
-                
-                change_price = round(price - prev_close, 2)
-                changes_per = round((change_price * 100) / price, 2)                
-                return price, f"{changes_per}%"
-            except ValueError:
-                st.error(f"Error converting price data for {index_name}")
-                return None
-        else:
-            st.error(f"Could not find required elements for {index_name}")
-            return None
-    else:
-        st.error(f"Failed to fetch data from {url}. Status code: {response.status_code}")
-        return None 
-
-
-    
-
 def get_index_info(index_name):
-    index_name_underscore = index_name.replace(" ", "_")
-    if index_name_underscore == "Sensex":
-        index_name_underscore = index_name_underscore.upper()
-        url = f"https://www.google.com/finance/quote/{index_name_underscore}:INDEXBOM"
-    else:
-        url = f"https://www.google.com/finance/quote/{index_name_underscore}:INDEXNSE"
-        
-    information = []
-    response = requests.get(url)
-    if response.status_code == 200:
-        soup = BeautifulSoup(response.content, 'html.parser')
-        data = soup.find_all(class_="P6K39c")
-        for i in data:
-            information.append(i.text.replace(",", ""))
-    
-    return information 
+    snapshot = get_quote(index_name)
+    # A panel drawn without its quote is redrawn by the tiles once the quote arrives
+    st.session_state.panel_waiting = None if snapshot else index_name
+    information = snapshot.stats if snapshot else []
+    # pad so a missing stat shows as None instead of breaking the panel
+    return information + [None] * 8
 
 
+def index_scraper(snapshot):
+    # Quotes are scraped by the shared background poller, this only reads the latest one
+    if snapshot is None:
+        return None, None
+    if snapshot.change_percent is None:
+        return snapshot.price, None
+    return snapshot.price, f"{snapshot.change_percent}%"
 
 
 def generate_unique_key():
@@ -118,61 +60,23 @@ def page_title():
         color_name="violet-70",
     )
 
-def plot_line_chart(x_axis, y_axis, index_name, interval):
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=x_axis, y=y_axis, mode='lines+markers', name='Price'))
-    fig.update_layout(
-        title=f'{index_name}',
-        xaxis_title=f'{interval}',
-        yaxis_title='Price',
-        hovermode='x unified',  
-        template='plotly_white'  
-    )    
-    return fig
-
-
-
-def filter_data(data, interval):
-    df = pd.DataFrame(data)
-    df['Date'] = pd.to_datetime(df['Date'], format='%m/%d/%Y %H:%M:%S')
-    df.set_index('Date', inplace=True)
-
-    if interval == "Day":
-        df_resampled = df.resample('D').mean().reset_index()
-    elif interval == "Month":
-        df_resampled = df.resample('M').mean().reset_index()
-    elif interval == "Year":
-        df_resampled = df.resample('Y').mean().reset_index()
+def get_index_data(index_name):
+    # Every recorded tick and every change of the CSV changes the charts of this index
+    tick_count = recorder.count(index_name)
+    data_version = (csv_mtime(index_name), tick_count)
     
-    return df_resampled['Date'].tolist(), df_resampled['Close'].tolist()
-    
-def get_index_data(index_name, interval):
-    data = load_data(index_name)
-    x_axis, y_axis = filter_data(data, interval)
-    fig = plot_line_chart(x_axis, y_axis, index_name, interval)
-    
-    # Display the plot and interval buttons in the same container    
+    # Display the range selector and the plot in the same container    
     container = st.container( border=True)
     with container:
         
-        # Buttons for interval selection
-        col1, col2, col3, col4 = st.columns([1,1.3,1,8])
-        with col1:
-            if st.button("Day"):
-                st.session_state.interval = 'Day'
-                st.rerun()
-        with col2:
-            if st.button("Month"):
-                st.session_state.interval = 'Month'
-                st.rerun()
-        with col3:
-            if st.button("Year"):
-                st.session_state.interval = 'Year'
-                st.rerun()
-        with col4:
-            pass  
+        # Intraday intervals join the chart's interval buttons once live prices are recorded
+        if not tick_count:
+            st.caption("1 min, 5 min and Hour appear once live prices are recorded")
+        
+        chart_range = st.radio("Range", list(RANGES), horizontal=True, key="range", label_visibility="collapsed")
+        
         # Plot the chart
-        st.plotly_chart(fig)
+        st.plotly_chart(chart_figure(index_name, chart_range, data_version))
         
         
     
@@ -233,49 +137,44 @@ def get_index_data(index_name, interval):
  
 
 
+# index name -> session state keys of its metric tile
+metric_keys = {
+    "Sensex": ("sensex_price", "sensex_changes"),
+    "Nifty 50": ("nifty_price", "nifty_changes"),
+    "Nifty bank": ("nifty_bank_price", "nifty_bank_changes"),
+    "Nifty IT": ("nifty_it_price", "nifty_it_changes"),
+}
+
+
 def update_metrics():
-    # Fetch index data
-    sense_price, sensex_changes = index_scraper("SENSEX")
-    nifty_price, nifty_changes = index_scraper("NIFTY_50")
-    nifty_bank_price, nifty_bank_changes = index_scraper("NIFTY_BANK")
-    nifty_it_price, nifty_it_changes = index_scraper("NIFTY_IT")
-    
-    # Store fetched values in session state
-    st.session_state.sensex_price = sense_price
-    st.session_state.sensex_changes = sensex_changes
-    st.session_state.nifty_price = nifty_price
-    st.session_state.nifty_changes = nifty_changes
-    st.session_state.nifty_bank_price = nifty_bank_price
-    st.session_state.nifty_bank_changes = nifty_bank_changes
-    st.session_state.nifty_it_price = nifty_it_price
-    st.session_state.nifty_it_changes = nifty_it_changes
-    
-    
-    
-def main():
-    page_title()    
-    st.markdown("</br>", unsafe_allow_html=True)
-    
-    # Initialize session state for metrics and interval
-    if 'sensex_price' not in st.session_state:
-        st.session_state.sensex_price = 0.0
-        st.session_state.sensex_changes = 0.0
-        st.session_state.nifty_price = 0.0
-        st.session_state.nifty_changes = 0.0
-        st.session_state.nifty_bank_price = 0.0
-        st.session_state.nifty_bank_changes = 0.0
-        st.session_state.nifty_it_price = 0.0
-        st.session_state.nifty_it_changes = 0.0
-    
-    if 'interval' not in st.session_state:
-        st.session_state.interval = 'Year'
-    if 'last_refresh' not in st.session_state:
-        st.session_state.last_refresh = time.time()    
-    
-    # Add a button to manually update the metrics
-    if st.button("Refresh"):
-        update_metrics()
-        st.rerun()  
+    # All tiles come from one batch call, indices the poller has no quote for yet keep their last value
+    quotes = get_quotes(metric_keys)
+    stale = []
+    for index_name, (price_key, changes_key) in metric_keys.items():
+        price, changes = index_scraper(quotes[index_name])
+        if price is None:
+            stale.append(index_name)
+            continue
+        # Store fetched values in session state
+        st.session_state[price_key] = price
+        st.session_state[changes_key] = changes
+    st.session_state.stale_metrics = stale
+    return quotes
+
+
+# seconds between two refreshes of the metric tiles
+REFRESH_INTERVAL = 10
+
+
+@st.fragment(run_every=REFRESH_INTERVAL)
+def metric_tiles():
+    # Quotes missing from the cache may only hold up this run for the render budget
+    start_render_budget()
+    # Reading the shared quote cache never waits on the network, so refresh the tiles on every run
+    quotes = update_metrics()
+    
+    # A click reruns only this fragment, which has just read the latest quotes
+    st.button("Refresh")
         
     st.caption("Please hit refresh button to get the latest data")
 
@@ -284,30 +183,57 @@ def main():
     with col1:
         cont1 = st.container(border=True)
         cont1.metric("Sensex", st.session_state.sensex_price, st.session_state.sensex_changes)
+        cont1.caption(freshness(quotes["Sensex"]))
     with col2:
         cont2 = st.container(border=True)
         cont2.metric("Nifty 50", st.session_state.nifty_price, st.session_state.nifty_changes)
+        cont2.caption(freshness(quotes["Nifty 50"]))
     with col3:
         cont3 = st.container(border=True)
         cont3.metric("Nifty bank", st.session_state.nifty_bank_price, st.session_state.nifty_bank_changes)
+        cont3.caption(freshness(quotes["Nifty bank"]))
     with col4:
         cont4 = st.container(border=True)
         cont4.metric("Nifty IT", st.session_state.nifty_it_price, st.session_state.nifty_it_changes)
+        cont4.caption(freshness(quotes["Nifty IT"]))
+    
+    # session state is shared between pages, so only report this page's indices
+    stale = [name for name in st.session_state.get('stale_metrics', []) if name in metric_keys]
+    if stale:
+        st.caption(f"Showing last known values for: {', '.join(stale)}")
+    
+    # The panels below only render on a full run, so fill in one that is still waiting for its quote
+    waiting = st.session_state.get('panel_waiting')
+    if quotes.get(waiting) is not None:
+        st.session_state.panel_waiting = None
+        st.rerun(scope="app")
+
+
+def main():
+    page_title()    
+    st.markdown("</br>", unsafe_allow_html=True)
+    
+    # Initialize session state for metrics
+    if 'sensex_price' not in st.session_state:
+        st.session_state.sensex_price = 0.0
+        st.session_state.sensex_changes = 0.0
+        st.session_state.nifty_price = 0.0
+        st.session_state.nifty_changes = 0.0
+        st.session_state.nifty_bank_price = 0.0
+        st.session_state.nifty_bank_changes = 0.0
+        st.session_state.nifty_it_price = 0.0
+        st.session_state.nifty_it_changes = 0.0
+    
+    # The tiles refresh on their own, the rest of the page only reruns on interaction
+    metric_tiles()
     
     st.markdown("<hr>", unsafe_allow_html=True)    
 
     # Selectbox for choosing index
     selected_index = st.selectbox("Select an Index", ["Sensex", "Nifty 50", "Nifty bank", "Nifty IT"])
-    interval = st.session_state.interval
 
-    get_index_data(selected_index, interval)
+    get_index_data(selected_index)
 
-    # Automatically refresh the data
-    last_refresh = st.session_state.get('last_refresh', 0)
-    if time.time() - last_refresh > 10:
-        update_metrics()
-        st.session_state.last_refresh = time.time()
-        st.rerun()   
            
  
 main()
@@ -1,11 +1,14 @@
 import streamlit as st
-import requests
 import pandas as pd
-import time
-from bs4 import BeautifulSoup
 from streamlit_extras.colored_header import colored_header
-import plotly.graph_objects as go
 import os
+from dataclasses import replace
+from utils.charts import chart_figure
+from utils.downsample import RANGES
+from utils.history import csv_mtime
+from utils.poller import get_quote, start_render_budget
+from utils.quotes import QuoteSnapshot, freshness
+from utils.ticks import recorder
 
 
 
@@ -30,26 +33,6 @@ def page_title():
         color_name="violet-70",
     )
 
-@st.cache_data
-def load_data(file_name):
-    try:
-        # Construct the path to the data file
-        file_path = os.path.join("Index_data", f"{file_name}.csv")
-        
-        # Ensure the file exists
-        if not os.path.exists(file_path):
-            st.error(f"File not found: {file_path}")
-            return None
-        
-        # Load the data
-        data = pd.read_csv(file_path, header=0)
-        return data
-    
-    except Exception as e:
-        st.error(f"An error occurred while loading the data: {e}")
-        return None
-    
-
 def download_data(file_name):
     try:
         # Construct the path to the data file
@@ -79,225 +62,65 @@ def download_data(file_name):
      
     
 
-# get stock information
-def get_stock_info(stock_name):
-    stock_urls = {
-        "TCS": "https://www.google.com/finance/quote/TCS:NSE",
-        "BlackRock": "https://www.google.com/finance/quote/BLK:NYSE",
-        "Meta": "https://www.google.com/finance/quote/META:NASDAQ",
-        "Google": "https://www.google.com/finance/quote/GOOG:NASDAQ",
-        "Amazon": "https://www.google.com/finance/quote/AMZN:NASDAQ",
-        "Nividia": "https://www.google.com/finance/quote/NVDA:NASDAQ",
-        "Apple": "https://www.google.com/finance/quote/AAPL:NASDAQ",
-        "SAP": "https://www.google.com/finance/quote/SAP:ETR",
-        "Infosys": "https://www.google.com/finance/quote/INFY:NSE",
-        "Tesla": "https://www.google.com/finance/quote/TSLA:NASDAQ",
-        "HDFC bank": "https://www.google.com/finance/quote/HDFCBANK:NSE"
-        
-    }
-
-    url = stock_urls.get(stock_name)
-    if not url:
-        return f"Stock name {stock_name} not found in dictionary."
-
-    information = []
-    response = requests.get(url)
-    if response.status_code != 200:
-        return f"Failed to retrieve data for {stock_name}. Status code: {response.status_code}"
-
-    soup = BeautifulSoup(response.text, 'html.parser')
-    data = soup.find_all(class_="P6K39c")
-    
-    for i in data:
-        information.append(i.text.replace(",", ""))
-
-    if len(information) < 8:
-        return f"Failed to retrieve complete data for {stock_name}. Check the structure of the webpage."
-
-    previous_close = information[0]
-    day_range = information[1]
-    year_range = information[2]
-    market_cap = information[3]
-    average_volume = information[4]
-    PE_ratio = information[5]
-    dividend_yield = information[6]
-    primary_exchange = information[7]
-    
-    return previous_close, day_range, year_range, market_cap, average_volume, PE_ratio, dividend_yield, primary_exchange
-
-
-
-def get_stock_info1(stock_name):
-    stock_urls = {
-        "TCS": "https://www.google.com/finance/quote/TCS:NSE",
-        "BlackRock": "https://www.google.com/finance/quote/BLK:NYSE",
-        "Meta": "https://www.google.com/finance/quote/META:NASDAQ",
-        "Google": "https://www.google.com/finance/quote/GOOG:NASDAQ",
-        "Amazon": "https://www.google.com/finance/quote/AMZN:NASDAQ",
-        "Nividia": "https://www.google.com/finance/quote/NVDA:NASDAQ",
-        "Apple": "https://www.google.com/finance/quote/AAPL:NASDAQ",
-        "SAP": "https://www.google.com/finance/quote/SAP:ETR",
-        "Infosys": "https://www.google.com/finance/quote/INFY:NSE",
-        "Tesla": "https://www.google.com/finance/quote/TSLA:NASDAQ",
-        "HDFC bank": "https://www.google.com/finance/quote/HDFCBANK:NSE"
-        
-    }
-
-    url = stock_urls.get(stock_name)
-    if not url:
-        return f"Stock name {stock_name} not found in dictionary."
-
-    information = []
-    response = requests.get(url)
-    if response.status_code != 200:
-        return f"Failed to retrieve data for {stock_name}. Status code: {response.status_code}"
-
-    soup = BeautifulSoup(response.text, 'html.parser')
-    data = soup.find_all(class_="P6K39c")
-    
-    for i in data:
-        information.append(i.text.replace(",", ""))
-
-    if len(information) < 8:
-        return f"Failed to retrieve complete data for {stock_name}. Check the structure of the webpage."
+# get stock price, stats and company profile from the latest shared snapshot
+def get_stock_snapshot(stock_name):
+    snapshot = get_quote(stock_name)
+    if snapshot is None:
+        st.error(f"No quote available for {stock_name} yet.")
+        return QuoteSnapshot(stock_name)
     
     if stock_name == "Tesla":
-        employee = 140473
-        founded = "Jul 1, 2003"
-        ceo = "Elon Musk"
-        return employee, founded, ceo
-    
-    ceo = information[9]
-    founded = information[10]
-    employee = information[12]
-    
-    
-    
-    return ceo, founded, employee
-    
-    
-    
-    
-
-# get stock price
-def get_stock_price(stock_name):
-    stock_urls = {
-        "TCS": "https://www.google.com/finance/quote/TCS:NSE",
-        "BlackRock": "https://www.google.com/finance/quote/BLK:NYSE",
-        "Meta": "https://www.google.com/finance/quote/META:NASDAQ",
-        "Google": "https://www.google.com/finance/quote/GOOG:NASDAQ",
-        "Amazon": "https://www.google.com/finance/quote/AMZN:NASDAQ",
-        "Nividia": "https://www.google.com/finance/quote/NVDA:NASDAQ",
-        "Apple": "https://www.google.com/finance/quote/AAPL:NASDAQ",
-        "SAP": "https://www.google.com/finance/quote/SAP:ETR",
-        "Infosys": "https://www.google.com/finance/quote/INFY:NSE",
-        "Tesla": "https://www.google.com/finance/quote/TSLA:NASDAQ",
-        "HDFC bank": "https://www.google.com/finance/quote/HDFCBANK:NSE"
-        
-    }
-
-    url = stock_urls.get(stock_name)
-    if not url:
-        return f"Stock name {stock_name} not found in dictionary."
-    response = requests.get(url)
-    soup = BeautifulSoup(response.content, "html.parser")
-    
-    # Extract current price
-    price_elem = soup.find(class_="YMlKec fxKbKc")
-    if price_elem:
-        price = float(price_elem.text.strip()[1:].replace(",", ""))
-    else:
-        price = None
-    
-    # Extract previous close
-    prev_close_elem = soup.find(class_="P6K39c")
-    if prev_close_elem:
-        prev_close = float(prev_close_elem.text.strip()[1:].replace(",", ""))
-    else:
-        prev_close = None
-    
-    # Calculate change in price and percentage change
-    if price is not None and prev_close is not None:
-        change_price = price - prev_close
-        changes_per = round((change_price * 100) / price, 2)
-    else:
-        change_price = None
-        changes_per = None
+        # the snapshot is shared by every session, so patch a copy
+        snapshot = replace(snapshot, ceo="Elon Musk", founded="Jul 1, 2003", employees=140473)
     
-    if stock_name in ["TCS", "Infosys", "HDFC bank"]:
-        return price, f"{changes_per}%"
-    else:  
-        return f"$ {price}", f"{changes_per}%" 
+    return snapshot
 
 
-def plot_line_chart(x_axis, y_axis, index_name, interval):
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=x_axis, y=y_axis, mode='lines+markers', name='Price'))
-    fig.update_layout(
-        title=f'{index_name}',
-        xaxis_title=f'{interval}',
-        yaxis_title='Price',
-        hovermode='x unified',  
-        template='plotly_white'  
-    )    
-    return fig
+def load_snapshot(stock_name, refresh=False):
+    # Reuse the snapshot of the selected stock until the next refresh
+    snapshot = st.session_state.get('snapshot')
+    if refresh or snapshot is None or snapshot.symbol != stock_name:
+        snapshot = get_stock_snapshot(stock_name)
+        st.session_state.snapshot = snapshot
+    return snapshot
 
 
-def filter_data(data, interval):
-    df = pd.DataFrame(data)
-    df['Date'] = pd.to_datetime(df['Date'], format='%m/%d/%Y %H:%M:%S')
-    df.set_index('Date', inplace=True)
-
-    if interval == "Day":
-        df_resampled = df.resample('D').mean().reset_index()
-    elif interval == "Month":
-        df_resampled = df.resample('M').mean().reset_index()
-    elif interval == "Year":
-        df_resampled = df.resample('Y').mean().reset_index()
+def get_index_data(index_name):
+    # Every recorded tick and every change of the CSV changes the charts of this index
+    tick_count = recorder.count(index_name)
+    data_version = (csv_mtime(index_name), tick_count)
     
-    return df_resampled['Date'].tolist(), df_resampled['Close'].tolist()
-
-
-
-def get_index_data(index_name, interval):
-    data = load_data(index_name)
-    x_axis, y_axis = filter_data(data, interval)
-    fig = plot_line_chart(x_axis, y_axis, index_name, interval)
-    
-    # Display the plot and interval buttons in the same container    
+    # Display the range selector and the plot in the same container    
     container = st.container( border=True)
     with container:
         
-        # Buttons for interval selection
-        col1, col2, col3, col4 = st.columns([1,1.3,1,8])
-        with col1:
-            if st.button("Day"):
-                st.session_state.interval = 'Day'
-                st.rerun()
-        with col2:
-            if st.button("Month"):
-                st.session_state.interval = 'Month'
-                st.rerun()
-        with col3:
-            if st.button("Year"):
-                st.session_state.interval = 'Year'
-                st.rerun()
-        with col4:
-            pass  
+        # Intraday intervals join the chart's interval buttons once live prices are recorded
+        if not tick_count:
+            st.caption("1 min, 5 min and Hour appear once live prices are recorded")
+        
+        chart_range = st.radio("Range", list(RANGES), horizontal=True, key="range", label_visibility="collapsed")
+        
         # Plot the chart
-        st.plotly_chart(fig)
+        st.plotly_chart(chart_figure(index_name, chart_range, data_version))
 
 
 def update_metrics(stock_name):
-    stock_price , stock_exchang = get_stock_price(stock_name)
+    snapshot = load_snapshot(stock_name, refresh=True)
+    stock_price = snapshot.price
+    stock_exchang = snapshot.change_percent
+    # No quote or no previous close yet, the tile shows a dash instead of "$ None" and "None%"
+    if stock_exchang is not None:
+        stock_exchang = f"{stock_exchang}%"
+    if stock_price is not None and stock_name not in ["TCS", "Infosys", "HDFC bank"]:
+        stock_price = f"$ {stock_price}"
     # stored fetch value in session state
     st.session_state.stock_price = stock_price
     st.session_state.stock_exchang = stock_exchang
 
 
 
-def company_info(stock_name):
-    ceo, founded, employees = get_stock_info1(stock_name)
+def company_info(stock_name, snapshot):
+    ceo, founded, employees = snapshot.ceo, snapshot.founded, snapshot.employees
     container4 = st.container(border=True)
     container4.write("Info")
     container4.markdown("<hr style='margin-top: 1px; margin-bottom: 12px;'>", unsafe_allow_html=True)
@@ -396,8 +219,9 @@ def company_info(stock_name):
                            leading player in the global investment industry.''')                                         
     
 
-def company_info2(stock_name):
-    pc , dr, yr, mc, av, pe, de, pre = get_stock_info(stock_name)
+def company_info2(snapshot):
+    pc, dr, yr, mc = snapshot.previous_close, snapshot.day_range, snapshot.year_range, snapshot.market_cap
+    av, pe, de, pre = snapshot.average_volume, snapshot.pe_ratio, snapshot.dividend_yield, snapshot.primary_exchange
     cont4 = st.container(border=True)
     cont4.write("Stock")
     cont4.markdown("<hr style='margin-top: 1px; margin-bottom: 12px;'>", unsafe_allow_html=True)
@@ -423,32 +247,44 @@ def refresh_app():
     st.rerun()
 
 
+# seconds between two refreshes of the stock tile
+REFRESH_INTERVAL = 10
+
+
+@st.fragment(run_every=REFRESH_INTERVAL)
+def stock_tile(stock_name):
+    # Quotes missing from the cache may only hold up this run for the render budget
+    start_render_budget()
+    # Reading the shared quote cache never waits on the network, so refresh the tile on every run
+    update_metrics(stock_name)
+    container1 = st.container(border=True)    
+    container1.metric(label=f"{stock_name}", value=st.session_state.stock_price, delta=st.session_state.stock_exchang)
+    container1.caption(freshness(load_snapshot(stock_name)))
+    
+    # The panels below only render on a full run, so fill them in once a missing quote arrives
+    if st.session_state.get('panel_waiting') == stock_name and load_snapshot(stock_name).price is not None:
+        st.session_state.panel_waiting = None
+        st.rerun(scope="app")
+
+
 def main():
     page_title()
-    # Initialize the session state for metrics and interval
+    # Initialize the session state for metrics
     if 'stock_price' not in st.session_state:
         st.session_state.stock_price = 0
     if 'stock_exchang' not in st.session_state:
         st.session_state.stock_exchang = 0
-    if 'last_refresh' not in st.session_state:
-        st.session_state.last_refresh = time.time()
-    if 'interval' not in st.session_state:
-        st.session_state.interval = 'Year'    
-        
     stock_name = st.selectbox("Select a stock", ["TCS", "Apple", "Infosys", "HDFC bank", "Nividia", "Meta", "Amazon", "Google", "SAP", "Tesla", "BlackRock"], on_change=refresh_app)    
-    interval = st.session_state.interval    
     
-    if st.button("Refresh"):
-        update_metrics(stock_name)
-        st.session_state.last_refresh = time.time()
-        st.rerun()
+    # A click reruns the page, the tile also refreshes on its own
+    st.button("Refresh")
     
     st.caption("Please hit refresh button to get the latest data")    
     
     col1 , col2 = st.columns([1,4])
     with col1:
-        container1 = st.container(border=True)    
-        container1.metric(label=f"{stock_name}", value=st.session_state.stock_price, delta=st.session_state.stock_exchang)
+        # The tile refreshes on its own, the rest of the page only reruns on interaction
+        stock_tile(stock_name)
     with col2:
         container2 = st.container(border=True)
         with container2:
@@ -463,19 +299,16 @@ def main():
                  
             
     
-    get_index_data(stock_name, interval)
+    get_index_data(stock_name)
     
+    # Both panels read from the same snapshot instead of fetching the page again
+    snapshot = load_snapshot(stock_name)
+    st.session_state.panel_waiting = stock_name if snapshot.price is None else None
     col3, col4 = st.columns(2)
     with col3:
-        company_info(stock_name)
+        company_info(stock_name, snapshot)
     with col4:
-        company_info2(stock_name)    
-    
-    # Automatically refresh the data every 10 seconds
-    if time.time() - st.session_state.last_refresh > 10:
-        update_metrics(stock_name)
-        st.session_state.last_refresh = time.time()
-        st.rerun()    
+        company_info2(snapshot)    
  
 
 
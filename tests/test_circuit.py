@@ -0,0 +1,61 @@
+import pytest
+import utils.circuit
+from utils.circuit import CircuitBreaker
+
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(utils.circuit.time, "time", clock.time)
+    return clock
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, base_backoff=5)
+    for _ in range(2):
+        breaker.record_failure()
+    assert not breaker.is_open and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.is_open and not breaker.allow()
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=3)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert not breaker.is_open
+
+
+def test_lets_one_probe_through_after_the_backoff(clock):
+    breaker = CircuitBreaker(failure_threshold=1, base_backoff=5)
+    breaker.record_failure()
+    clock.now += 5
+    assert not breaker.is_open
+    assert breaker.allow()
+    # Everyone else keeps failing fast while the probe is out
+    assert breaker.is_open and not breaker.allow()
+
+    breaker.record_success()
+    assert not breaker.is_open and breaker.allow()
+
+
+def test_backoff_doubles_up_to_the_cap(clock):
+    breaker = CircuitBreaker(failure_threshold=1, base_backoff=5, max_backoff=12)
+    for backoff in (5, 10, 12, 12):
+        breaker.record_failure()
+        assert breaker.open_until - clock.now == backoff
+        clock.now += backoff
+        assert breaker.allow()
@@ -0,0 +1,50 @@
+import numpy as np
+from utils.downsample import MAX_POINTS, lttb, window
+
+
+
+def series(size):
+    dates = np.datetime64('2000-01-01') + np.arange(size).astype('m8[D]')
+    prices = np.cumsum(np.random.default_rng(3).normal(size=size)) + 100
+    return dates, prices
+
+
+def test_lttb_keeps_endpoints_and_point_count():
+    dates, prices = series(15000)
+    x, y = lttb(dates, prices)
+    assert len(x) == len(y) == MAX_POINTS
+    assert (x[0], y[0]) == (dates[0], prices[0])
+    assert (x[-1], y[-1]) == (dates[-1], prices[-1])
+
+
+def test_lttb_picks_points_of_the_series_in_order():
+    dates, prices = series(5000)
+    x, y = lttb(dates, prices, 300)
+    assert np.all(np.diff(x.astype(np.int64)) > 0)
+    picked = np.searchsorted(dates, x)
+    np.testing.assert_array_equal(prices[picked], y)
+
+
+def test_lttb_keeps_extremes():
+    # A single spike is the largest triangle of its bucket
+    dates, prices = series(5000)
+    prices[2500] = prices.max() + 1000
+    _, y = lttb(dates, prices, 300)
+    assert prices[2500] in y
+
+
+def test_lttb_leaves_short_series_alone():
+    dates, prices = series(500)
+    x, y = lttb(dates, prices)
+    np.testing.assert_array_equal(x, dates)
+    np.testing.assert_array_equal(y, prices)
+
+
+def test_window_cuts_to_the_last_days():
+    dates, prices = series(1000)
+    x, y = window(dates, prices, 30)
+    assert x[0] == dates[-1] - np.timedelta64(30, 'D')
+    assert x[-1] == dates[-1] and len(x) == len(y) == 31
+
+    x, _ = window(dates, prices, None)
+    assert len(x) == 1000
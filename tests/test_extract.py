@@ -0,0 +1,45 @@
+import pytest
+from benchmarks.fixtures import load_fixtures, recorded
+from utils.extract import ENGINES, extract_quote
+from utils.quotes import parse_snapshot
+from utils.symbols import SYMBOLS
+
+# bs4 is the reference every engine has to agree with
+pytest.importorskip("bs4")
+from benchmarks.bench_extract import extract_bs4
+
+
+
+PAGES = load_fixtures(recorded())
+
+
+def test_every_asset_class_has_a_fixture():
+    assert {SYMBOLS[name][1] for name in PAGES} == {asset_class for _, asset_class in SYMBOLS.values()}
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("name", PAGES)
+def test_engines_agree_with_bs4(engine, name):
+    html = PAGES[name]
+    assert ENGINES[engine](html) == extract_bs4(html)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_class_names_in_scripts_styles_and_comments_are_text(engine):
+    html = (
+        '<html><head><script>var t=\'<div class="P6K39c">fake</div><div class="YMlKec fxKbKc">0</div>\';</script>'
+        '<STYLE>.P6K39c{}</STYLE></head><body><!-- <div class="P6K39c">old</div> -->'
+        '<div class="YMlKec fxKbKc">$1,234.50</div><div class="gyFHrc"><div class="P6K39c">real</div></div></body></html>'
+    )
+    assert ENGINES[engine](html) == extract_bs4(html) == ("$1,234.50", ["real"])
+
+
+def test_stock_page_fills_the_snapshot():
+    snapshot = parse_snapshot("Apple", PAGES["Apple"])
+    assert snapshot.price == 220.91 and snapshot.previous_close == 218.54
+    assert (snapshot.market_cap, snapshot.ceo, snapshot.employees) == ("3.36T USD", "Tim Cook", "161000")
+
+
+def test_default_engine_matches_bs4_on_every_fixture():
+    for html in PAGES.values():
+        assert extract_quote(html) == extract_bs4(html)
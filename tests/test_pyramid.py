@@ -0,0 +1,96 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from utils.history import DATE_FORMAT, NA_VALUES, csv_path, read_csv
+import utils.history
+import utils.pyramid
+from utils.pyramid import INTERVALS, Pyramid, pyramid_for
+from utils.ticks import TickRecorder
+
+
+
+# resample rule that labels buckets the way each pyramid level does
+RULES = {"Day": "D", "Week": "W", "Month": "ME", "Quarter": "QE", "Year": "YE"}
+
+
+def resampled(dates, closes, interval):
+    means = pd.Series(closes, index=pd.DatetimeIndex(dates)).resample(RULES[interval]).mean().dropna()
+    return means.index.to_numpy().astype('M8[D]'), means.to_numpy()
+
+
+def assert_matches(pyramid, dates, closes, interval):
+    ends, means = pyramid.series(interval)
+    expected_ends, expected_means = resampled(dates, closes, interval)
+    np.testing.assert_array_equal(ends, expected_ends)
+    np.testing.assert_allclose(means, expected_means, rtol=1e-12)
+
+
+@pytest.fixture(autouse=True)
+def recorder(tmp_path, monkeypatch):
+    # Every test starts without recorded ticks
+    recorder = TickRecorder(str(tmp_path))
+    monkeypatch.setattr(utils.pyramid, "recorder", recorder)
+    return recorder
+
+
+@pytest.mark.parametrize("interval", INTERVALS)
+def test_levels_match_resample(interval):
+    # Several prices a day, unsorted, with gaps and missing values
+    rng = np.random.default_rng(7)
+    dates = np.datetime64('2018-12-28') + rng.integers(0, 3 * 365 * 24, 5000).astype('m8[h]')
+    closes = rng.uniform(100, 200, len(dates))
+    closes[rng.integers(0, len(dates), 200)] = np.nan
+
+    pyramid = Pyramid("synthetic", dates, closes, 0)
+    assert_matches(pyramid, dates, closes, interval)
+
+
+@pytest.mark.parametrize("name", ["Sensex", "USD INR", "Bitcoin"])
+def test_levels_match_resample_on_history(name):
+    # Built from the compact columns the app loads, compared with a plain float64 parse of the CSV
+    data = read_csv(csv_path(name))
+    raw = pd.read_csv(csv_path(name), na_values=NA_VALUES)
+    dates = pd.to_datetime(raw['Date'], format=DATE_FORMAT).to_numpy()
+
+    pyramid = Pyramid(name, data['Date'].to_numpy(), data['Close'].to_numpy(), 0)
+    for interval in INTERVALS:
+        assert_matches(pyramid, dates, raw['Close'].to_numpy(dtype='float64'), interval)
+
+
+@pytest.mark.parametrize("interval", INTERVALS)
+def test_recorded_ticks_fold_in_like_a_rebuild(interval, recorder):
+    dates = np.arange('2023-01-01', '2023-03-01', dtype='M8[D]').astype('M8[ns]')
+    closes = np.linspace(10, 20, len(dates))
+    pyramid = Pyramid("ticks", dates, closes, 0)
+
+    # Every six hours for two months after the history, stored as unix seconds like the poller does
+    offset = time.localtime().tm_gmtoff
+    local = np.arange('2023-03-01', '2023-05-01', 6, dtype='M8[h]')
+    prices = np.linspace(20, 30, len(local))
+    for moment, price in zip(local, prices):
+        recorder.record("ticks", moment.astype('M8[s]').astype(np.int64) - offset, price)
+
+    assert_matches(pyramid, np.r_[dates, local.astype('M8[ns]')], np.r_[closes, prices], interval)
+
+
+def test_a_changed_csv_builds_the_pyramid_again(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils.history, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(utils.pyramid, "_pyramids", {})
+    path = tmp_path / "Synthetic.csv"
+    loads = []
+
+    def load(name):
+        loads.append(utils.history.csv_mtime(name))
+        return pd.DataFrame({'Date': pd.to_datetime(['2024-01-02']), 'Close': [float(len(loads))]})
+
+    path.write_text("Date,Close\n")
+    os.utime(path, (1000, 1000))
+    first = pyramid_for("Synthetic", load)
+    assert pyramid_for("Synthetic", load) is first and loads == [1000]
+
+    os.utime(path, (2000, 2000))
+    second = pyramid_for("Synthetic", load)
+    assert second is not first and loads == [1000, 2000]
+    assert second.series("Day")[1].tolist() == [2.0]
@@ -0,0 +1,91 @@
+import pytest
+import utils.ratelimit
+from utils.ratelimit import PANEL, TILE, RateLimited, RateLimiter, TokenBucket
+
+URL = "https://quotes.example/finance/quote/X"
+
+
+
+class Clock:
+    # Monotonic time that only moves when someone sleeps
+
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(utils.ratelimit.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(utils.ratelimit.time, "sleep", clock.sleep)
+    return clock
+
+
+def test_bucket_grants_the_burst_then_refills_at_the_rate(clock):
+    bucket = TokenBucket(rate=4, burst=8)
+    assert [bucket.take() for _ in range(8)] == [0] * 8
+    assert bucket.take() == pytest.approx(0.25)
+    clock.sleep(0.5)
+    assert bucket.take() == 0 and bucket.take() == 0
+    assert bucket.take() > 0
+
+
+def test_bucket_keeps_the_floor(clock):
+    bucket = TokenBucket(rate=4, burst=8)
+    assert [bucket.take(floor=4) for _ in range(4)] == [0] * 4
+    assert bucket.take(floor=4) == pytest.approx(0.25)
+    assert bucket.take() == 0
+
+
+def test_panels_leave_the_reserve_to_tiles(clock):
+    limiter = RateLimiter(rate=4, burst=8)
+    assert limiter.headroom(URL, PANEL) == 4 and limiter.headroom(URL, TILE) == 8
+    for _ in range(4):
+        limiter.acquire(URL, PANEL)
+    assert limiter.headroom(URL, PANEL) == 0 and limiter.headroom(URL, TILE) == 4
+    for _ in range(4):
+        limiter.acquire(URL, TILE)
+    assert clock.now == 100.0
+
+
+def test_requests_queue_up_to_max_wait_then_drop(clock, monkeypatch):
+    monkeypatch.setattr(utils.ratelimit, "MAX_WAIT", 1)
+    limiter = RateLimiter(rate=4, burst=2)
+    for _ in range(3):
+        limiter.acquire(URL, TILE)
+    assert clock.now == pytest.approx(100.25)
+
+    # Panels queue too, until the reserve of one token is back on top of their own
+    limiter.acquire(URL, PANEL)
+    assert clock.now == pytest.approx(100.75)
+
+    # A token further away than MAX_WAIT is not waited for
+    slow = RateLimiter(rate=0.5, burst=1)
+    slow.acquire(URL, TILE)
+    with pytest.raises(RateLimited):
+        slow.acquire(URL, TILE)
+    assert clock.now == pytest.approx(100.75)
+
+    assert limiter.stats()[("quotes.example", TILE)] == {"granted": 3, "throttled": 1, "dropped": 0}
+    assert limiter.stats()[("quotes.example", PANEL)] == {"granted": 1, "throttled": 1, "dropped": 0}
+    assert slow.stats()[("quotes.example", TILE)] == {"granted": 1, "throttled": 0, "dropped": 1}
+
+
+def test_panels_still_run_on_a_tiny_burst(clock):
+    limiter = RateLimiter(rate=4, burst=1)
+    limiter.acquire(URL, PANEL)
+    limiter.acquire(URL, PANEL)
+    assert clock.now == pytest.approx(100.25)
+
+
+def test_rate_zero_turns_limiting_off(clock):
+    limiter = RateLimiter(rate=0, burst=1)
+    for _ in range(100):
+        limiter.acquire(URL, PANEL)
+    assert limiter.headroom(URL, PANEL) == float("inf") and clock.now == 100.0
@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import deque
+import numpy as np
+import pandas as pd
+from utils.ticks import recorder
+
+
+
+# bar length in seconds for every resolution that is built
+RESOLUTIONS = {"1m": 60, "5m": 300, "1h": 3600, "1d": 86400}
+
+# chart intervals served from the bars instead of the CSV history
+INTRADAY = {"1 min": "1m", "5 min": "5m", "Hour": "1h"}
+
+# bars kept per symbol and resolution, a day and a half of minutes
+MAX_BARS = 2160
+
+START, OPEN, HIGH, LOW, CLOSE, TICKS = range(6)
+
+
+class BarBuilder:
+    # Folds every tick into the open bar of each resolution, so a tick costs the same however long the history
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bars = {}
+        self._last = {}
+
+    @staticmethod
+    def _fold(symbol_bars, timestamp, price, resolutions=RESOLUTIONS):
+        # Bars follow the local wall clock like the CSVs, daily bars start at local midnight
+        local = timestamp + time.localtime(timestamp).tm_gmtoff
+        for resolution in resolutions:
+            seconds = RESOLUTIONS[resolution]
+            start = local - local % seconds
+            bars = symbol_bars[resolution]
+            if bars and bars[-1][START] == start:
+                bar = bars[-1]
+                bar[HIGH] = max(bar[HIGH], price)
+                bar[LOW] = min(bar[LOW], price)
+                bar[CLOSE] = price
+                bar[TICKS] += 1
+            elif not bars or start > bars[-1][START]:
+                bars.append([start, price, price, price, price, 1])
+
+    def _replay(self, name):
+        # Only the ticks recent enough to land in a kept bar, each resolution from its own window on.
+        # The windows nest, so every stretch between two window starts feeds the resolutions open there.
+        symbol_bars = {resolution: deque(maxlen=MAX_BARS) for resolution in RESOLUTIONS}
+        ticks = recorder.read(name)
+        now = time.time()
+        starts = sorted((int(np.searchsorted(ticks["time"], now - MAX_BARS * seconds)), resolution)
+                        for resolution, seconds in RESOLUTIONS.items())
+        open_resolutions = []
+        for index, (start, resolution) in enumerate(starts):
+            open_resolutions.append(resolution)
+            end = starts[index + 1][0] if index + 1 < len(starts) else len(ticks["time"])
+            for timestamp, price in zip(ticks["time"][start:end].tolist(), ticks["price"][start:end].tolist()):
+                self._fold(symbol_bars, timestamp, price, open_resolutions)
+        last = float(ticks["time"][-1]) if len(ticks["time"]) else None
+        return symbol_bars, last
+
+    def _load(self, name):
+        # The first use of a symbol in this process replays what the recorder kept from earlier runs,
+        # outside the lock so other symbols are not held up meanwhile
+        with self._lock:
+            if name in self._bars:
+                return
+        symbol_bars, last = self._replay(name)
+        with self._lock:
+            if name not in self._bars:
+                self._bars[name] = symbol_bars
+                if last is not None:
+                    self._last[name] = last
+
+    def add(self, name, timestamp, price):
+        # Call before the tick is recorded, otherwise loading the history would count it twice
+        self._load(name)
+        with self._lock:
+            if self._last.get(name) == timestamp:
+                return
+            self._fold(self._bars[name], timestamp, price)
+            self._last[name] = timestamp
+
+    def frame(self, name, resolution):
+        self._load(name)
+        with self._lock:
+            rows = [list(bar) for bar in self._bars[name][resolution]]
+        bars = pd.DataFrame(rows, columns=['Date', 'Open', 'High', 'Low', 'Close', 'Ticks'])
+        bars['Date'] = pd.to_datetime(bars['Date'], unit='s')
+        return bars
+
+    def series(self, name, resolution):
+        # Same shape as filter_data, dates and closing prices
+        bars = self.frame(name, resolution)
+        return bars['Date'].to_numpy(), bars['Close'].to_numpy()
+
+
+bars = BarBuilder()
@@ -0,0 +1,99 @@
+import os
+import plotly.graph_objects as go
+import streamlit as st
+from utils.bars import INTRADAY, bars
+from utils.downsample import RANGES, lttb, window
+from utils.history import csv_path, load_history
+from utils.pyramid import INTERVALS, pyramid_for
+from utils.ticks import with_ticks
+
+
+
+# above this many points a line is drawn with WebGL and without markers
+WEBGL_THRESHOLD = 1000
+
+# "auto", or "svg" / "webgl" to force one renderer for every chart
+RENDERER = os.environ.get("MONEYVIEW_CHART_RENDERER", "auto")
+
+
+def line_trace(x_axis, y_axis, name, renderer=None):
+    renderer = renderer or RENDERER
+    if renderer == "auto":
+        renderer = "webgl" if len(y_axis) > WEBGL_THRESHOLD else "svg"
+    if renderer == "webgl":
+        # Thousands of SVG markers make panning and hovering crawl, WebGL lines stay smooth
+        return go.Scattergl(x=x_axis, y=y_axis, mode='lines', name=name)
+    return go.Scatter(x=x_axis, y=y_axis, mode='lines+markers', name=name)
+
+
+def interval_menu(intervals, active):
+    # One button per interval, each shows only that interval's trace. Switching happens in the browser,
+    # so the figure has to hold one trace per interval in the same order.
+    buttons = [
+        dict(label=interval, method='update',
+             args=[{'visible': [other == interval for other in intervals]}, {'xaxis.title.text': interval}])
+        for interval in intervals
+    ]
+    return dict(type='buttons', direction='right', buttons=buttons, active=intervals.index(active),
+                showactive=True, x=1, xanchor='right', y=1.02, yanchor='bottom')
+
+
+def load_data(name):
+    # The symbol's CSV continued with the prices recorded since it was last updated. Without new ticks this
+    # is the history frame every session shares, so never modify it.
+    path = csv_path(name)
+    try:
+        if not os.path.exists(path):
+            st.error(f"File not found: {path}")
+            return None
+        return with_ticks(load_history(name), name)
+    except Exception as e:
+        st.error(f"An error occurred while loading the data: {e}")
+        return None
+
+
+# series maps every interval to its dates and prices, only `interval` is visible at first.
+# renderer is "svg" or "webgl" to force one, by default long series switch to WebGL
+def plot_line_chart(series, index_name, interval, renderer=None):
+    fig = go.Figure()
+    for name, (x_axis, y_axis) in series.items():
+        trace = line_trace(x_axis, y_axis, 'Price', renderer)
+        trace.visible = name == interval
+        fig.add_trace(trace)
+    fig.update_layout(
+        title=f'{index_name}',
+        xaxis_title=f'{interval}',
+        yaxis_title='Price',
+        hovermode='x unified',
+        template='plotly_white',
+        updatemenus=[interval_menu(list(series), interval)]
+    )
+    return fig
+
+
+def filter_data(index_name, interval):
+    # Every interval is a level of the index's aggregation pyramid, built once and kept current with the ticks
+    pyramid = pyramid_for(index_name, load_data)
+    if pyramid is None:
+        return [], []
+    return pyramid.series(interval)
+
+
+# Built once per index, range and data version and shared by every session and page. The figure carries
+# every interval, so switching between them happens in the browser and never reaches the server.
+@st.cache_resource(max_entries=64)
+def chart_figure(index_name, chart_range, data_version=0):
+    series = {}
+    for name in INTERVALS:
+        series[name] = filter_data(index_name, name)
+    for name, resolution in INTRADAY.items():
+        # The CSVs only hold daily prices, intraday charts come from the bars built out of live ticks
+        x_axis, y_axis = bars.series(index_name, resolution)
+        if len(x_axis):
+            series[name] = x_axis, y_axis
+
+    # Long histories are thinned to the chart width, a shorter range shows that period in full detail
+    for name, (x_axis, y_axis) in series.items():
+        series[name] = lttb(*window(x_axis, y_axis, RANGES[chart_range]))
+    # Every chart opens on the yearly view, the buttons take it from there in the browser
+    return plot_line_chart(series, index_name, 'Year')
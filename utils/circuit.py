@@ -0,0 +1,74 @@
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+
+
+
+# consecutive failures that open the circuit for a host
+FAILURE_THRESHOLD = 3
+
+# seconds the circuit stays open after the first trip, doubling on every further trip
+BASE_BACKOFF = 5
+MAX_BACKOFF = 300
+
+
+class UpstreamUnavailable(requests.ConnectionError):
+    pass
+
+
+class CircuitBreaker:
+    # Closed while the host answers, open (failing fast) while backing off, then one probe is let through
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, base_backoff=BASE_BACKOFF, max_backoff=MAX_BACKOFF):
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0
+        self.probing = False
+
+    @property
+    def is_open(self):
+        with self._lock:
+            if self.failures < self.failure_threshold:
+                return False
+            return self.probing or time.time() < self.open_until
+
+    def allow(self):
+        with self._lock:
+            if self.failures < self.failure_threshold:
+                return True
+            if self.probing or time.time() < self.open_until:
+                return False
+            self.probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.trips = 0
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.probing = False
+            if self.failures >= self.failure_threshold:
+                self.trips += 1
+                backoff = min(self.max_backoff, self.base_backoff * 2 ** (self.trips - 1))
+                self.open_until = time.time() + backoff
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(url):
+    host = urlsplit(url).netloc
+    with _breakers_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker()
+        return _breakers[host]
@@ -0,0 +1,46 @@
+import numpy as np
+
+
+
+# points drawn per chart, roughly the pixel width of the chart on a wide layout
+MAX_POINTS = 1200
+
+# chart ranges in days, a shorter range is drawn from fewer points and keeps its full detail
+RANGES = {"All": None, "10Y": 3650, "5Y": 1825, "1Y": 365, "6M": 182, "1M": 30}
+
+
+def window(x_axis, y_axis, days):
+    # The last `days` of a series sorted by date
+    x_axis, y_axis = np.asarray(x_axis), np.asarray(y_axis)
+    if days is None or not len(x_axis):
+        return x_axis, y_axis
+    start = np.searchsorted(x_axis, x_axis[-1] - np.timedelta64(days, 'D'))
+    return x_axis[start:], y_axis[start:]
+
+
+def lttb(x_axis, y_axis, threshold=MAX_POINTS):
+    # Largest-Triangle-Three-Buckets: keeps the first and last point and, from every bucket in between,
+    # the point spanning the largest triangle with the previous pick and the next bucket's average
+    x_axis, y_axis = np.asarray(x_axis), np.asarray(y_axis)
+    size = len(y_axis)
+    if size <= threshold or threshold < 3:
+        return x_axis, y_axis
+
+    x = x_axis.astype(np.int64).astype(np.float64) if x_axis.dtype.kind == 'M' else x_axis.astype(np.float64)
+    y = y_axis.astype(np.float64)
+    edges = np.linspace(1, size - 1, threshold - 1).astype(np.int64)
+
+    picked = np.empty(threshold, dtype=np.int64)
+    picked[0], picked[-1] = 0, size - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_x, next_y = x[end:edges[bucket + 2]].mean(), y[end:edges[bucket + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        picked[bucket + 1] = previous
+    return x_axis[picked], y_axis[picked]
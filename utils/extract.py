@@ -0,0 +1,163 @@
+import bisect
+import os
+import re
+from html.parser import HTMLParser
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser as SelectolaxParser
+    except ImportError:
+        SelectolaxParser = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+
+
+# Google Finance class names for the live price and the key-stats values
+PRICE_CLASS = "YMlKec fxKbKc"
+STATS_CLASS = "P6K39c"
+
+# the stock pages list 13 stats including the company profile, nothing after that is needed
+MAX_STATS = 13
+
+# tags that never get a closing tag
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+# characters fed to the tokenizer at a time while reading one node
+CHUNK = 512
+
+_target_class = re.compile(rf'class="({PRICE_CLASS}|[^"<>]*\b{STATS_CLASS}\b[^"<>]*)"')
+
+# script and style bodies and comments are not markup, a class name in there is only text
+_raw_text_start = re.compile(r'<(script|style)\b|<!--', re.I)
+
+
+class _Done(Exception):
+    pass
+
+
+class _NodeParser(HTMLParser):
+    # Tokenizes from the start tag of one node and stops as soon as that node is closed
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.text = []
+        self._depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in VOID_TAGS:
+            self._depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS:
+            return
+        self._depth -= 1
+        if self._depth == 0:
+            raise _Done()
+
+    def handle_data(self, data):
+        self.text.append(data)
+
+
+def _node_text(html, start):
+    parser = _NodeParser()
+    try:
+        for offset in range(start, len(html), CHUNK):
+            parser.feed(html[offset:offset + CHUNK])
+        parser.close()
+    except _Done:
+        pass
+    return "".join(parser.text)
+
+
+def _raw_text_spans(html):
+    # Flat [start, end, start, end, ...] offsets of every script, style and comment, their bodies are
+    # skipped with str.find instead of being matched character by character
+    spans = []
+    lower = None
+    position = 0
+    while True:
+        found = _raw_text_start.search(html, position)
+        if found is None:
+            return spans
+        if found.group(1):
+            closing = f"</{found.group(1)}"
+            end = html.find(closing, found.end())
+            if end < 0:
+                lower = lower or html.lower()
+                end = lower.find(closing.lower(), found.end())
+        else:
+            end = html.find("-->", found.end())
+        end = len(html) if end < 0 else end
+        spans += [found.start(), end]
+        position = end
+
+
+def _extract_stream(html):
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", errors="replace")
+    price = None
+    stats = []
+    raw = _raw_text_spans(html)
+    # Jump straight to the class attributes we need instead of tokenizing the whole page
+    for match in _target_class.finditer(html):
+        # An odd index falls between the start and end of a script, style or comment
+        if bisect.bisect_right(raw, match.start()) % 2:
+            continue
+        start = html.rfind("<", 0, match.start())
+        if match.group(1) == PRICE_CLASS:
+            if price is None:
+                price = _node_text(html, start)
+        else:
+            stats.append(_node_text(html, start))
+        if price is not None and len(stats) >= MAX_STATS:
+            break
+    return price, stats
+
+
+def _extract_selectolax(html):
+    tree = SelectolaxParser(html)
+    price_elem = tree.css_first(f'[class="{PRICE_CLASS}"]')
+    stats = [node.text() for node in tree.css(f".{STATS_CLASS}")[:MAX_STATS]]
+    return (price_elem.text() if price_elem else None), stats
+
+
+def _extract_lxml(html):
+    tree = lxml.html.fromstring(html)
+    price_elem = tree.xpath(f'//*[@class="{PRICE_CLASS}"]')
+    stats = tree.xpath(f'//*[contains(concat(" ", normalize-space(@class), " "), " {STATS_CLASS} ")]')
+    stats = [node.text_content() for node in stats[:MAX_STATS]]
+    return (price_elem[0].text_content() if price_elem else None), stats
+
+
+ENGINES = {"stream": _extract_stream}
+if SelectolaxParser is not None:
+    ENGINES["selectolax"] = _extract_selectolax
+if lxml is not None:
+    ENGINES["lxml"] = _extract_lxml
+
+
+def default_engine():
+    # MONEYVIEW_HTML_ENGINE pins an engine, otherwise the fastest on benchmarks/fixtures: selectolax when
+    # installed, then the targeted scanner, which beats lxml and needs nothing beyond the standard library
+    engine = os.environ.get("MONEYVIEW_HTML_ENGINE")
+    if engine in ENGINES:
+        return engine
+    return "selectolax" if "selectolax" in ENGINES else "stream"
+
+
+def extract_quote(html, engine=None):
+    # Returns the raw price text and the key-stats texts in page order
+    engine = engine or default_engine()
+    price, stats = ENGINES[engine](html)
+    if price is None and engine == "stream":
+        # Markup the scanner does not recognise, let a full parser have a go if one is installed
+        for fallback in ("selectolax", "lxml"):
+            if fallback in ENGINES:
+                return ENGINES[fallback](html)
+    return price, stats
@@ -0,0 +1,13 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+
+# upper bound on concurrent upstream requests for the whole process
+MAX_WORKERS = 8
+
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="quotes")
+
+
+def submit(func, *args):
+    return _executor.submit(func, *args)
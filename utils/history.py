@@ -0,0 +1,140 @@
+import logging
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+
+
+DATA_DIR = "Index_data"
+DATE_FORMAT = '%m/%d/%Y %H:%M:%S'
+
+# layout of every Index_data file, FX and crypto files write missing values as #N/A
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+COUNT_COLUMNS = ['Volume']
+NA_VALUES = ['#N/A']
+
+# binary copies of the CSVs, rebuilt whenever a CSV is newer than its copy
+CACHE_DIR = os.environ.get("MONEYVIEW_HISTORY_CACHE_DIR", os.path.join(".cache", "index_data"))
+
+# bumped whenever the stored layout changes, so older copies are not read
+FORMAT = 2
+
+
+def csv_path(name):
+    # Slashes cannot appear in file names, so "USD/INR" is stored as "USD INR.csv"
+    return os.path.join(DATA_DIR, f"{name.replace('/', ' ')}.csv")
+
+
+def csv_mtime(name):
+    # When the symbol's CSV last changed, 0 without one
+    try:
+        return os.path.getmtime(csv_path(name))
+    except OSError:
+        return 0
+
+
+def _binary_path(name):
+    return os.path.join(CACHE_DIR, f"{name.replace('/', ' ')}.{FORMAT}.npy")
+
+
+def _decimals(values):
+    # Fewest decimal places that still write every value exactly
+    for decimals in range(7):
+        if np.all(np.abs(np.round(values, decimals) - values) < 1e-9):
+            return decimals
+    return None
+
+
+def compact(values, count=False):
+    # int32 for gapless counts, float32 when it rounds back to every value at the column's precision
+    finite = values[~np.isnan(values)]
+    if count and len(finite) == len(values) and np.all(finite % 1 == 0) and np.all(np.abs(finite) < 2 ** 31):
+        return values.astype(np.int32)
+    decimals = _decimals(finite)
+    if decimals is not None and np.all(np.abs(finite.astype(np.float32) - finite) < 0.5 * 10.0 ** -decimals):
+        return values.astype(np.float32)
+    return values
+
+
+def read_csv(path):
+    # #N/A becomes NaN while parsing, dates are parsed once here and columns with no values at all are dropped
+    numeric = PRICE_COLUMNS + COUNT_COLUMNS
+    data = pd.read_csv(path, header=0, na_values=NA_VALUES, dtype=dict.fromkeys(numeric, 'float64'))
+    data['Date'] = pd.to_datetime(data['Date'], format=DATE_FORMAT)
+    for column in numeric:
+        if column not in data:
+            continue
+        if data[column].isna().all():
+            data = data.drop(columns=column)
+        else:
+            data[column] = compact(data[column].to_numpy(), count=column in COUNT_COLUMNS)
+    return data
+
+
+def convert(name):
+    # Store the parsed CSV as one structured array with the column types read_csv picked
+    data = read_csv(csv_path(name))
+    records = np.empty(len(data), dtype=[(column, data[column].dtype.str) for column in data.columns])
+    for column in data.columns:
+        records[column] = data[column].to_numpy()
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _binary_path(name)
+    with open(f"{path}.tmp", 'wb') as f:
+        np.save(f, records, allow_pickle=False)
+    os.replace(f"{path}.tmp", path)
+    return data
+
+
+_frames = {}
+_frames_lock = threading.Lock()
+
+
+def _map(name, source):
+    # A missing or outdated binary copy is rebuilt from the CSV first
+    binary = _binary_path(name)
+    try:
+        stale = os.path.getmtime(binary) < os.path.getmtime(source)
+    except OSError:
+        stale = True
+    if stale:
+        convert(name)
+    records = np.load(binary, mmap_mode='r', allow_pickle=False)
+    return pd.DataFrame({column: records[column] for column in records.dtype.names}, copy=False)
+
+
+def load_history(name):
+    # One frame per symbol and process, its columns are read-only views of the memory-mapped binary copy,
+    # so sessions share the pages of the file instead of holding copies. Never modify the returned frame.
+    source = csv_path(name)
+    modified = os.path.getmtime(source)
+    with _frames_lock:
+        cached = _frames.get(name)
+    if cached is not None and cached[0] == modified:
+        return cached[1]
+
+    try:
+        frame = _map(name, source)
+    except (OSError, ValueError):
+        logging.getLogger(__name__).exception("Could not cache %s, reading the CSV", source)
+        frame = read_csv(source)
+    with _frames_lock:
+        _frames[name] = (modified, frame)
+    return frame
+
+
+def main():
+    # Convert every CSV ahead of time, e.g. after the data files were updated
+    for file_name in sorted(os.listdir(DATA_DIR)):
+        if not file_name.endswith(".csv"):
+            continue
+        name = file_name[:-len(".csv")]
+        started = time.perf_counter()
+        data = convert(name)
+        print(f"{name:<16}{len(data):>8} rows{(time.perf_counter() - started) * 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
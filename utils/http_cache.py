@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+
+# on-disk response cache shared by all sessions and kept across restarts
+CACHE_DIR = os.environ.get("MONEYVIEW_HTTP_CACHE_DIR", os.path.join(".cache", "http"))
+MAX_BYTES = int(os.environ.get("MONEYVIEW_HTTP_CACHE_MB", 64)) * 1024 * 1024
+
+_max_age = re.compile(r"max-age=(\d+)")
+
+
+class ResponseCache:
+    # Stores bodies with their validators and evicts the least recently used ones past max_bytes
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode()).hexdigest()
+        return os.path.join(self.directory, f"{key}.json"), os.path.join(self.directory, f"{key}.body")
+
+    def load(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        return meta, body
+
+    def store(self, url, response):
+        cache_control = response.headers.get("Cache-Control", "")
+        if "no-store" in cache_control:
+            return
+        match = _max_age.search(cache_control)
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_type": response.headers.get("Content-Type"),
+            "max_age": int(match.group(1)) if match and "no-cache" not in cache_control else 0,
+            "stored_at": time.time(),
+        }
+        # Without a validator or a max-age there is nothing to gain from keeping the body
+        if not (meta["etag"] or meta["last_modified"] or meta["max_age"]):
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        meta_path, body_path = self._paths(url)
+        # Write to temp files and rename so readers never see half a page
+        suffix = f".{threading.get_ident()}.tmp"
+        with open(body_path + suffix, 'wb') as f:
+            f.write(response.content)
+        with open(meta_path + suffix, 'w') as f:
+            json.dump(meta, f)
+        os.replace(body_path + suffix, body_path)
+        os.replace(meta_path + suffix, meta_path)
+        self.evict()
+
+    def revalidated(self, url, meta, response):
+        # A 304 may carry fresh validators, and the entry counts as recently used again
+        meta["etag"] = response.headers.get("ETag", meta["etag"])
+        meta["last_modified"] = response.headers.get("Last-Modified", meta["last_modified"])
+        meta["stored_at"] = time.time()
+        meta_path, _ = self._paths(url)
+        try:
+            with open(meta_path, 'w') as f:
+                json.dump(meta, f)
+        except OSError:
+            pass
+        self.touch(url)
+
+    def touch(self, url):
+        # Eviction goes by modification time, so a read marks the body as recently used
+        try:
+            os.utime(self._paths(url)[1])
+        except OSError:
+            pass
+
+    def is_fresh(self, meta):
+        return time.time() - meta["stored_at"] < meta["max_age"]
+
+    def evict(self):
+        with self._lock:
+            entries = []
+            for file_name in os.listdir(self.directory):
+                if not file_name.endswith(".body"):
+                    continue
+                path = os.path.join(self.directory, file_name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                for stale in (path, path[:-len(".body")] + ".json"):
+                    try:
+                        os.remove(stale)
+                    except OSError:
+                        pass
+                total -= size
+
+
+def cached_response(url, meta, body, source):
+    # Rebuild a 200 response from disk so callers cannot tell it apart from a download
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = body
+    response.encoding = "utf-8"
+    response.headers = CaseInsensitiveDict({"Content-Type": meta.get("content_type") or "text/html", "X-Cache": source})
+    return response
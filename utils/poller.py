@@ -0,0 +1,197 @@
+import logging
+import threading
+import time
+from concurrent.futures import wait
+from urllib.parse import urlsplit
+from utils.bars import bars
+from utils.circuit import UpstreamUnavailable, breaker_for
+from utils.fanout import submit
+from utils.quote_client import fetch
+from utils.quote_store import store
+from utils.quotes import parse_snapshot
+from utils.ratelimit import PANEL, TILE, RateLimited, limiter
+from utils.symbols import PAGES, SYMBOLS, quote_url, ttl
+from utils.ticks import recorder
+
+
+
+# seconds between two checks of the symbol universe for expired quotes
+POLL_TICK = 1
+
+# seconds a session waits for a symbol that has never been fetched
+FIRST_FETCH_WAIT = 5
+
+# seconds one page run may spend waiting on quotes in total
+RENDER_BUDGET = 2
+
+# seconds a symbol a session asked for counts as on screen, e.g. the stock picked on the Stocks page
+WATCH_WINDOW = 60
+
+
+_thread = None
+_thread_lock = threading.Lock()
+
+# symbol -> future of the fetch currently running for it, every caller for that symbol joins this one
+# request and parse instead of starting another
+_inflight = {}
+_last_attempt = {}
+_inflight_lock = threading.Lock()
+
+_render = threading.local()
+
+# symbols shown as metric tiles, the rest only back the stock info panels
+_tiles = {name for names in PAGES.values() for name in names}
+
+# symbol -> last time a session asked for it
+_watched = {}
+
+
+def fetch_quote(name, priority=TILE):
+    response = fetch(quote_url(name), priority=priority)
+    if response.status_code != 200:
+        logging.getLogger(__name__).warning("Quote page of %s answered HTTP %s", name, response.status_code)
+        return None
+    snapshot = parse_snapshot(name, response.content)
+    snapshot.fetched_at = time.time()
+    return snapshot
+
+
+def _refresh(name, priority):
+    try:
+        snapshot = fetch_quote(name, priority)
+        # Keep the previous quote when this fetch failed
+        if snapshot is not None and snapshot.price is None:
+            logging.getLogger(__name__).warning("No price found on the quote page of %s", name)
+        if snapshot is not None and snapshot.price is not None:
+            store.publish(name, snapshot)
+            # Only a price move is a tick
+            if snapshot.price != recorder.last_price(name):
+                bars.add(name, snapshot.fetched_at, snapshot.price)
+                recorder.record(name, snapshot.fetched_at, snapshot.price)
+        return snapshot
+    except RateLimited:
+        # It never reached upstream, so it goes again on the next poll tick instead of after a TTL
+        with _inflight_lock:
+            _last_attempt.pop(name, None)
+        raise
+    except UpstreamUnavailable as error:
+        # The breaker is backing off, an expected state that needs no traceback per symbol
+        logging.getLogger(__name__).warning("%s", error)
+        raise
+    except Exception:
+        # Nobody reads the future of a background refresh, so this is the only trace of the failure
+        logging.getLogger(__name__).exception("Could not refresh the quote of %s", name)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(name, None)
+
+
+def _priority(name):
+    # Metric tiles and whatever a session asked for lately are on screen, the rest only backs the panels
+    if name in _tiles or time.time() - _watched.get(name, 0) < WATCH_WINDOW:
+        return TILE
+    return PANEL
+
+
+def refresh(name, priority=None):
+    # Start a background fetch unless one is already running for this symbol
+    if priority is None:
+        priority = _priority(name)
+    with _inflight_lock:
+        future = _inflight.get(name)
+        if future is None:
+            _last_attempt[name] = time.time()
+            future = submit(_refresh, name, priority)
+            _inflight[name] = future
+    return future
+
+
+def _due(name):
+    # Expired and not retried within the last TTL, so a failing symbol is not hammered
+    if store.is_fresh(name):
+        return False
+    return time.time() - _last_attempt.get(name, 0) >= ttl(name)
+
+
+def _fetched_at(name):
+    snapshot = store.get(name)
+    return 0 if snapshot is None else snapshot.fetched_at
+
+
+def poll_once():
+    # Start only what the rate limit grants right now, oldest quote first. The rest waits for the next
+    # tick, which also spreads symbols that share a TTL instead of firing them all at once.
+    started = {}
+    for name in sorted(filter(_due, SYMBOLS), key=_fetched_at):
+        with _inflight_lock:
+            if name in _inflight:
+                continue
+        url = quote_url(name)
+        host = urlsplit(url).netloc
+        if limiter.headroom(url, _priority(name)) <= started.get(host, 0):
+            continue
+        started[host] = started.get(host, 0) + 1
+        refresh(name)
+
+
+def _run():
+    while True:
+        try:
+            poll_once()
+        except Exception:
+            logging.getLogger(__name__).exception("Quote poll failed")
+        time.sleep(POLL_TICK)
+
+
+def start_poller():
+    # One poller per process, no matter how many sessions are open
+    global _thread
+    if _thread is None:
+        with _thread_lock:
+            if _thread is None:
+                _thread = threading.Thread(target=_run, name="quote-poller", daemon=True)
+                _thread.start()
+
+
+def start_render_budget(seconds=RENDER_BUDGET):
+    # Called at the top of every page run, get_quote never waits past this deadline
+    _render.deadline = time.time() + seconds
+
+
+def _remaining_budget():
+    deadline = getattr(_render, "deadline", None)
+    if deadline is None:
+        return FIRST_FETCH_WAIT
+    return max(0, min(FIRST_FETCH_WAIT, deadline - time.time()))
+
+
+def get_quotes(names):
+    # Stale-while-revalidate for a whole page: cached quotes come back at once and are refreshed in
+    # the background, the missing ones are fetched in parallel and waited for together
+    start_poller()
+    names = list(dict.fromkeys(names))
+    now = time.time()
+    for name in names:
+        _watched[name] = now
+    pending = []
+    for name in names:
+        if store.get(name) is not None:
+            if _due(name):
+                refresh(name)
+            continue
+        # Upstream is known to be down, render right away with what we have
+        if breaker_for(quote_url(name)).is_open:
+            continue
+        # A session is blocked on this one, so it is fetched now even if an earlier attempt failed
+        # within the TTL, and it goes ahead of the background panels
+        pending.append(refresh(name, TILE))
+
+    # Nothing cached yet for these, wait for their first fetch within the render budget
+    if pending:
+        wait(pending, timeout=_remaining_budget())
+    return {name: store.get(name) for name in names}
+
+
+def get_quote(name):
+    return get_quotes([name])[name]
@@ -0,0 +1,156 @@
+import threading
+import time
+import numpy as np
+from utils.history import csv_mtime
+from utils.ticks import recorder
+
+
+
+# chart interval -> pyramid level, every level is built from the daily one
+INTERVALS = {"Day": "D", "Week": "W", "Month": "M", "Quarter": "Q", "Year": "Y"}
+LEVELS = ("D", "W", "M", "Q", "Y")
+
+
+def bucket_end(level, days):
+    # Last day of the bucket each day falls in, the same labels resample('D'/'W'/'ME'/'QE'/'YE') uses
+    days = np.asarray(days, dtype='M8[D]')
+    if level == "D":
+        return days
+    if level == "W":
+        # 1970-01-01 was a Thursday, weeks end on Sunday
+        number = days.astype(np.int64)
+        return (number + (3 - number) % 7).astype('M8[D]')
+    if level == "M":
+        return (days.astype('M8[M]') + 1).astype('M8[D]') - 1
+    if level == "Q":
+        months = days.astype('M8[M]').astype(np.int64)
+        return ((months - months % 3 + 3).astype('M8[M]')).astype('M8[D]') - 1
+    return (days.astype('M8[Y]') + 1).astype('M8[D]') - 1
+
+
+class Level:
+    # Bucket labels with the sum and count behind each mean, so finer buckets merge into coarser ones exactly
+
+    def __init__(self, ends, sums, counts):
+        self.size = len(ends)
+        capacity = max(16, self.size * 2)
+        self.ends = np.empty(capacity, dtype='M8[D]')
+        self.sums = np.empty(capacity)
+        self.counts = np.empty(capacity, dtype=np.int64)
+        self.means = np.empty(capacity)
+        self.ends[:self.size] = ends
+        self.sums[:self.size] = sums
+        self.counts[:self.size] = counts
+        self.means[:self.size] = sums / np.maximum(counts, 1)
+
+    def add(self, end, value, count=1):
+        # Updates the last bucket, or opens a new one, amortized O(1)
+        if self.size and self.ends[self.size - 1] == end:
+            index = self.size - 1
+        else:
+            if self.size == len(self.ends):
+                for name in ("ends", "sums", "counts", "means"):
+                    grown = np.empty(len(self.ends) * 2, dtype=getattr(self, name).dtype)
+                    grown[:self.size] = getattr(self, name)[:self.size]
+                    setattr(self, name, grown)
+            index = self.size
+            self.ends[index] = end
+            self.sums[index] = 0
+            self.counts[index] = 0
+            self.size += 1
+        self.sums[index] += value
+        self.counts[index] += count
+        self.means[index] = self.sums[index] / self.counts[index]
+
+    def series(self):
+        ends, means = self.ends[:self.size], self.means[:self.size]
+        ends.flags.writeable = False
+        means.flags.writeable = False
+        return ends, means
+
+
+def _reduce(keys, sums, counts):
+    # Merge runs of equal keys, the keys are sorted
+    if not len(keys):
+        return keys, sums, counts
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return keys[starts], np.add.reduceat(sums, starts), np.add.reduceat(counts, starts)
+
+
+class Pyramid:
+    # Daily, weekly, monthly, quarterly and yearly mean closes of one symbol, kept current as ticks arrive
+
+    def __init__(self, name, dates, closes, tick_count):
+        self.name = name
+        self.ticks = tick_count
+        self._lock = threading.Lock()
+
+        # Missing prices (#N/A) are skipped like resample().mean() does
+        dates = np.asarray(dates, dtype='M8[ns]')
+        closes = np.asarray(closes)
+        # Compact float32 prices are widened through their shortest decimal form, 80519.34 rather than 80519.34375
+        if closes.dtype == np.float32:
+            closes = closes.astype(str)
+        closes = closes.astype(np.float64)
+        valid = ~np.isnan(closes)
+        dates, closes = dates[valid], closes[valid]
+        order = np.argsort(dates, kind='stable')
+        dates, closes = dates[order], closes[order]
+        self.last = dates[-1] if len(dates) else None
+
+        days, sums, counts = _reduce(dates.astype('M8[D]'), closes, np.ones(len(closes), dtype=np.int64))
+        self.levels = {"D": Level(days, sums, counts)}
+        for level in LEVELS[1:]:
+            self.levels[level] = Level(*_reduce(bucket_end(level, days), sums, counts))
+
+    def _append(self, date, close):
+        day = np.datetime64(date, 'D')
+        for level in LEVELS:
+            self.levels[level].add(bucket_end(level, day), close)
+        self.last = date
+
+    def sync(self):
+        # Fold in only the ticks recorded since the last call
+        count = recorder.count(self.name)
+        if count <= self.ticks:
+            return
+        with self._lock:
+            ticks = recorder.read(self.name)
+            offset = time.localtime().tm_gmtoff
+            for timestamp, price in zip(ticks["time"][self.ticks:count].tolist(), ticks["price"][self.ticks:count].tolist()):
+                date = np.datetime64(int((timestamp + offset) * 1e9), 'ns')
+                if np.isnan(price) or (self.last is not None and date <= self.last):
+                    continue
+                self._append(date, price)
+            self.ticks = max(self.ticks, min(count, len(ticks["time"])))
+
+    def series(self, interval):
+        self.sync()
+        with self._lock:
+            return self.levels[INTERVALS[interval]].series()
+
+
+_pyramids = {}
+_pyramids_lock = threading.Lock()
+
+
+def pyramid_for(name, load):
+    # Built once per symbol and version of its CSV from load(name), a DataFrame of Date and Close.
+    # Ticks are folded in as they arrive, a changed CSV builds the pyramid again.
+    modified = csv_mtime(name)
+    with _pyramids_lock:
+        cached = _pyramids.get(name)
+    if cached is not None and cached[0] == modified:
+        return cached[1]
+
+    tick_count = recorder.count(name)
+    data = load(name)
+    if data is None:
+        return None
+    pyramid = Pyramid(name, data['Date'].to_numpy(), data['Close'].to_numpy(), tick_count)
+    with _pyramids_lock:
+        cached = _pyramids.get(name)
+        if cached is not None and cached[0] == modified:
+            return cached[1]
+        _pyramids[name] = (modified, pyramid)
+        return pyramid
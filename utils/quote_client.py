@@ -0,0 +1,83 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from utils.circuit import UpstreamUnavailable, breaker_for
+from utils.http_cache import ResponseCache, cached_response
+from utils.ratelimit import TILE, limiter
+
+
+
+# (connect, read) timeouts in seconds for every quote request
+TIMEOUT = (3.05, 10)
+
+# size of the keep-alive connection pool shared by all pages and sessions
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 32
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Encoding": "gzip, deflate",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Connection": "keep-alive",
+}
+
+
+_session = None
+_session_lock = threading.Lock()
+
+cache = ResponseCache()
+
+
+def get_session():
+    # One pooled session per process so repeated quotes reuse open TCP/TLS connections
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update(HEADERS)
+                _session = session
+    return _session
+
+
+def fetch(url, timeout=TIMEOUT, priority=TILE):
+    # Serve from the disk cache while fresh, otherwise revalidate it with a conditional request
+    cached = cache.load(url)
+    headers = {}
+    if cached is not None:
+        meta, body = cached
+        if cache.is_fresh(meta):
+            cache.touch(url)
+            return cached_response(url, meta, body, "HIT")
+        if meta["etag"]:
+            headers["If-None-Match"] = meta["etag"]
+        if meta["last_modified"]:
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    # Fail fast while the host is backing off instead of tying up a thread on a dead connection
+    breaker = breaker_for(url)
+    if breaker.is_open:
+        raise UpstreamUnavailable(f"Upstream for {url} is unavailable, retrying later")
+    limiter.acquire(url, priority)
+    if not breaker.allow():
+        raise UpstreamUnavailable(f"Upstream for {url} is unavailable, retrying later")
+    try:
+        response = get_session().get(url, timeout=timeout, headers=headers)
+    except requests.RequestException:
+        breaker.record_failure()
+        raise
+    if response.status_code >= 500 or response.status_code == 429:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+    if response.status_code == 304 and cached is not None:
+        cache.revalidated(url, meta, response)
+        return cached_response(url, meta, body, "REVALIDATED")
+    if response.status_code == 200:
+        cache.store(url, response)
+    return response
@@ -0,0 +1,76 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from dataclasses import asdict
+from utils.quotes import QuoteSnapshot
+from utils.symbols import ttl
+
+
+
+# last good quote of every symbol, kept across restarts so tiles never start at 0.0
+DB_PATH = os.environ.get("MONEYVIEW_QUOTE_DB", os.path.join(".cache", "quotes.sqlite3"))
+
+
+class QuoteStore:
+    # Latest snapshot per symbol, written in the background and read by every session
+
+    def __init__(self, path=DB_PATH):
+        self._lock = threading.Lock()
+        self._quotes = {}
+        self._db = None
+        if path:
+            self._open(path)
+
+    def _open(self, path):
+        # Without a usable database the store simply stays in memory
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS quotes (name TEXT PRIMARY KEY, snapshot TEXT NOT NULL)")
+            rows = self._db.execute("SELECT name, snapshot FROM quotes").fetchall()
+        except (sqlite3.Error, OSError):
+            logging.getLogger(__name__).exception("Quote database %s is unavailable, keeping quotes in memory only", path)
+            self._db = None
+            return
+        for name, snapshot in rows:
+            self._load(name, snapshot)
+
+    def _load(self, name, snapshot):
+        # A row written by an older QuoteSnapshot layout is dropped, the next fetch stores it again
+        try:
+            self._quotes[name] = QuoteSnapshot(**json.loads(snapshot))
+        except (TypeError, ValueError):
+            logging.getLogger(__name__).warning("Dropping the unreadable stored quote of %s", name)
+            try:
+                self._db.execute("DELETE FROM quotes WHERE name = ?", (name,))
+            except sqlite3.Error:
+                logging.getLogger(__name__).exception("Could not delete the stored quote of %s", name)
+
+    def publish(self, name, snapshot):
+        with self._lock:
+            self._quotes[name] = snapshot
+            if self._db is not None:
+                try:
+                    self._db.execute("INSERT OR REPLACE INTO quotes VALUES (?, ?)", (name, json.dumps(asdict(snapshot))))
+                except sqlite3.Error:
+                    logging.getLogger(__name__).exception("Could not save the quote of %s", name)
+
+    def get(self, name):
+        with self._lock:
+            return self._quotes.get(name)
+
+    def age(self, name):
+        snapshot = self.get(name)
+        return None if snapshot is None else snapshot.age
+
+    def is_fresh(self, name):
+        age = self.age(name)
+        return age is not None and age < ttl(name)
+
+
+store = QuoteStore()
@@ -0,0 +1,94 @@
+import time
+from dataclasses import dataclass, field
+from utils.extract import extract_quote
+
+
+@dataclass
+class QuoteSnapshot:
+    symbol: str
+    price: float = None
+    previous_close: float = None
+    day_range: str = None
+    year_range: str = None
+    market_cap: str = None
+    average_volume: str = None
+    pe_ratio: str = None
+    dividend_yield: str = None
+    primary_exchange: str = None
+    ceo: str = None
+    founded: str = None
+    employees: str = None
+    # every key-stats value in page order, their meaning depends on the asset class
+    stats: list = field(default_factory=list)
+    # unix time the page was downloaded
+    fetched_at: float = None
+
+    @property
+    def change_percent(self):
+        if self.price is None or self.previous_close is None or not self.price:
+            return None
+        return round((self.price - self.previous_close) * 100 / self.price, 2)
+
+    @property
+    def age(self):
+        if self.fetched_at is None:
+            return None
+        return time.time() - self.fetched_at
+
+
+def to_float(text):
+    # Drop currency signs, thousands separators and anything else that is not part of the number
+    number = ''.join(filter(lambda x: x.isdigit() or x == '.', text))
+    try:
+        return float(number)
+    except ValueError:
+        return None
+
+
+def parse_snapshot(symbol, html):
+    price_text, stats = extract_quote(html)
+    snapshot = QuoteSnapshot(symbol)
+
+    if price_text:
+        snapshot.price = to_float(price_text)
+
+    stats = [i.replace(",", "") for i in stats]
+    snapshot.stats = stats
+
+    # Key stats are listed in a fixed order, followed by the company profile
+    fields = {
+        0: "previous_close",
+        1: "day_range",
+        2: "year_range",
+        3: "market_cap",
+        4: "average_volume",
+        5: "pe_ratio",
+        6: "dividend_yield",
+        7: "primary_exchange",
+        9: "ceo",
+        10: "founded",
+        12: "employees",
+    }
+    for position, attr in fields.items():
+        if position < len(stats):
+            setattr(snapshot, attr, stats[position])
+
+    if snapshot.previous_close is not None:
+        snapshot.previous_close = to_float(snapshot.previous_close)
+
+    return snapshot
+
+
+def freshness(snapshot):
+    # Short label for the metric tiles telling how old the shown value is
+    if snapshot is None or snapshot.age is None:
+        return "Waiting for data"
+    age = int(snapshot.age)
+    # Quotes restored after a restart can be hours or days old
+    if age < 120:
+        return f"Updated {age}s ago"
+    if age < 7200:
+        return f"Updated {age // 60}m ago"
+    if age < 172800:
+        return f"Updated {age // 3600}h ago"
+    return f"Updated {age // 86400}d ago"
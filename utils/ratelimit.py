@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+
+
+
+# requests per second and burst allowed to every upstream host, a rate of 0 turns limiting off
+RATE = float(os.environ.get("MONEYVIEW_RATE_LIMIT", 4))
+BURST = float(os.environ.get("MONEYVIEW_RATE_BURST", 8))
+
+# priority classes, tiles a viewer is looking at go before the quotes behind the info panels
+TILE = 0
+PANEL = 1
+
+# share of the burst that panel requests leave untouched for tiles
+PANEL_RESERVE = 0.5
+
+# seconds a request may wait for a token before it is dropped
+MAX_WAIT = 2
+
+
+class RateLimited(requests.RequestException):
+    pass
+
+
+class TokenBucket:
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _fill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self):
+        with self._lock:
+            self._fill()
+            return self.tokens
+
+    def take(self, floor=0):
+        # Take a token if more than `floor` are left, otherwise return the seconds until one is
+        with self._lock:
+            self._fill()
+            if self.tokens >= floor + 1:
+                self.tokens -= 1
+                return 0
+            return (floor + 1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    # One token bucket per host, shared by every session in the process
+
+    def __init__(self, rate=RATE, burst=BURST):
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._counts = {}
+
+    def _bucket(self, host):
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return self._buckets[host]
+
+    def _count(self, host, priority, outcome):
+        with self._lock:
+            counts = self._counts.setdefault((host, priority), {"granted": 0, "throttled": 0, "dropped": 0})
+            counts[outcome] += 1
+
+    def _floor(self, priority):
+        # The bucket never holds more than the burst, so a panel always has at least one token to reach
+        return 0 if priority == TILE else max(0, min(self.burst * PANEL_RESERVE, self.burst - 1))
+
+    def headroom(self, url, priority=TILE):
+        # Requests of this priority the host's bucket grants right now without waiting
+        if self.rate <= 0:
+            return float("inf")
+        return max(0, int(self._bucket(urlsplit(url).netloc).available() - self._floor(priority)))
+
+    def acquire(self, url, priority=TILE):
+        # Panel requests queue behind the reserve, so they wait longer than tiles but are not dropped
+        # while the budget recovers within MAX_WAIT
+        if self.rate <= 0:
+            return
+        host = urlsplit(url).netloc
+        bucket = self._bucket(host)
+        floor = self._floor(priority)
+        deadline = time.monotonic() + MAX_WAIT
+
+        throttled = False
+        while True:
+            wait = bucket.take(floor)
+            if wait == 0:
+                self._count(host, priority, "granted")
+                if throttled:
+                    self._count(host, priority, "throttled")
+                return
+            if time.monotonic() + wait > deadline:
+                self._count(host, priority, "dropped")
+                raise RateLimited(f"Request budget for {host} is used up")
+            throttled = True
+            time.sleep(wait)
+
+    def stats(self):
+        # {(host, priority): {"granted": n, "throttled": n, "dropped": n}}, throttled requests waited for a token
+        with self._lock:
+            return {key: dict(counts) for key, counts in self._counts.items()}
+
+
+limiter = RateLimiter()
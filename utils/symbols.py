@@ -0,0 +1,90 @@
+import os
+
+
+
+# point MONEYVIEW_QUOTE_BASE_URL at a stand-in server (benchmarks/quote_server.py) for load tests
+QUOTE_URL = "https://www.google.com/finance/quote/"
+
+
+# seconds a quote stays fresh per asset class, override with e.g. MONEYVIEW_TTL_CRYPTO=2
+TTL = {
+    "crypto": 5,
+    "index": 15,
+    "futures": 15,
+    "stock": 15,
+    "fx": 30,
+}
+
+
+# Google Finance ticker and asset class of every tile, index panel and stock shown in the app
+SYMBOLS = {
+    # India
+    "Sensex": ("SENSEX:INDEXBOM", "index"),
+    "Nifty 50": ("NIFTY_50:INDEXNSE", "index"),
+    "Nifty bank": ("NIFTY_BANK:INDEXNSE", "index"),
+    "Nifty IT": ("NIFTY_IT:INDEXNSE", "index"),
+    
+    # US
+    "DOW Jones": (".DJI:INDEXDJX", "index"),
+    "S&P 500": (".INX:INDEXSP", "index"),
+    "NASDAQ": (".IXIC:INDEXNASDAQ", "index"),
+    "Russell 2000": ("RUT:INDEXRUSSELL", "index"),
+    
+    # Europe
+    "DAX": ("DAX:INDEXDB", "index"),
+    "FTSE 100": ("UKX:INDEXFTSE", "index"),
+    "CAC 40": ("PX1:INDEXEURO", "index"),
+    "IBEX 35": ("INDI:INDEXBME", "index"),
+    
+    # Currencies
+    "USD/INR": ("USD-INR", "fx"),
+    "EUR/INR": ("EUR-INR", "fx"),
+    "GBP/INR": ("GBP-INR", "fx"),
+    "AUD/INR": ("AUD-INR", "fx"),
+    
+    # Crypto
+    "Bitcoin": ("BTC-INR", "crypto"),
+    "Ethereum": ("ETH-INR", "crypto"),
+    "Cardano": ("ADA-INR", "crypto"),
+    "Dogecoin": ("DOGE-INR", "crypto"),
+    
+    # Futures
+    "DOW Futures": ("YMW00:CBOT", "futures"),
+    "S&P Futures": ("ESW00:CME_EMINIS", "futures"),
+    "NASDAQ Futures": ("NQW00:CME_EMINIS", "futures"),
+    "Gold": ("GCW00:COMEX", "futures"),
+    
+    # Stocks
+    "TCS": ("TCS:NSE", "stock"),
+    "BlackRock": ("BLK:NYSE", "stock"),
+    "Meta": ("META:NASDAQ", "stock"),
+    "Google": ("GOOG:NASDAQ", "stock"),
+    "Amazon": ("AMZN:NASDAQ", "stock"),
+    "Nividia": ("NVDA:NASDAQ", "stock"),
+    "Apple": ("AAPL:NASDAQ", "stock"),
+    "SAP": ("SAP:ETR", "stock"),
+    "Infosys": ("INFY:NSE", "stock"),
+    "Tesla": ("TSLA:NASDAQ", "stock"),
+    "HDFC bank": ("HDFCBANK:NSE", "stock"),
+}
+
+
+# metric tiles of every market page
+PAGES = {
+    "India": ["Sensex", "Nifty 50", "Nifty bank", "Nifty IT"],
+    "US": ["DOW Jones", "S&P 500", "NASDAQ", "Russell 2000"],
+    "Europe": ["DAX", "FTSE 100", "CAC 40", "IBEX 35"],
+    "Currencies": ["USD/INR", "EUR/INR", "GBP/INR", "AUD/INR"],
+    "Crypto": ["Bitcoin", "Ethereum", "Cardano", "Dogecoin"],
+    "Futures": ["DOW Futures", "S&P Futures", "NASDAQ Futures", "Gold"],
+}
+
+
+def quote_url(name):
+    base_url = os.environ.get("MONEYVIEW_QUOTE_BASE_URL", QUOTE_URL).rstrip("/")
+    return f"{base_url}/{SYMBOLS[name][0]}"
+
+
+def ttl(name):
+    asset_class = SYMBOLS[name][1]
+    return float(os.environ.get(f"MONEYVIEW_TTL_{asset_class.upper()}", TTL[asset_class]))
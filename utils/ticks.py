@@ -0,0 +1,91 @@
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+
+
+# append-only tick files, one raw little-endian float64 file per column and symbol
+TICK_DIR = os.environ.get("MONEYVIEW_TICK_DIR", os.path.join(".cache", "ticks"))
+COLUMNS = ("time", "price")
+DTYPE = np.dtype("<f8")
+
+
+class TickRecorder:
+    # Keeps every scraped price so the historical series keep growing past the CSVs
+
+    def __init__(self, directory=TICK_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._last = {}
+        self._prices = {}
+
+    def _path(self, name, column):
+        return os.path.join(self.directory, name.replace("/", " "), f"{column}.f8")
+
+    def _last_price(self, name):
+        # Last recorded price, read back from the file once per symbol and process
+        if name not in self._prices:
+            prices = self.read(name)["price"]
+            self._prices[name] = float(prices[-1]) if len(prices) else None
+        return self._prices[name]
+
+    def last_price(self, name):
+        with self._lock:
+            return self._last_price(name)
+
+    def record(self, name, timestamp, price):
+        with self._lock:
+            # The same download must not be recorded twice, and an unchanged price (a cached page, a
+            # closed market) adds nothing but weekend buckets and repeated rows
+            if self._last.get(name) == timestamp or self._last_price(name) == price:
+                return
+            os.makedirs(os.path.dirname(self._path(name, "time")), exist_ok=True)
+            for column, value in zip(COLUMNS, (timestamp, price)):
+                with open(self._path(name, column), 'ab') as f:
+                    f.write(np.array([value], dtype=DTYPE).tobytes())
+            self._last[name] = timestamp
+            self._prices[name] = price
+
+    def count(self, name):
+        # Grows with every tick, so it doubles as the data version of a symbol
+        try:
+            return os.path.getsize(self._path(name, "time")) // DTYPE.itemsize
+        except OSError:
+            return 0
+
+    def read(self, name):
+        # Read-only memory maps of every column, cut to the rows all columns have in full
+        columns = {}
+        for column in COLUMNS:
+            path = self._path(name, column)
+            try:
+                rows = os.path.getsize(path) // DTYPE.itemsize
+            except OSError:
+                rows = 0
+            columns[column] = np.memmap(path, dtype=DTYPE, mode='r', shape=(rows,)) if rows else np.empty(0, dtype=DTYPE)
+        rows = min(len(values) for values in columns.values())
+        return {column: values[:rows] for column, values in columns.items()}
+
+
+recorder = TickRecorder()
+
+
+def with_ticks(data, name):
+    # The CSV baseline followed by the recorded ticks, in the same columns
+    ticks = recorder.read(name)
+    if data is None or not len(ticks["time"]):
+        return data
+    last = data['Date'].iloc[-1] if len(data) else None
+
+    # The CSVs hold local wall-clock times, so shift the unix timestamps the same way
+    dates = pd.to_datetime(ticks["time"] + time.localtime().tm_gmtoff, unit='s')
+    newer = dates > last if last is not None else np.ones(len(dates), dtype=bool)
+    prices = np.asarray(ticks["price"])[newer]
+    recorded = pd.DataFrame({'Date': dates[newer]})
+    # Only the columns this symbol has, in their compact types
+    for column in data.columns[1:]:
+        values = np.zeros(len(prices)) if column == 'Volume' else prices
+        recorded[column] = values.astype(data[column].dtype)
+    return pd.concat([data, recorded], ignore_index=True)